@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from caminhos import CAMINHO_PAINEL, RAIZ, preparar_saida
+from exportacao import CASAS_COORDENADAS
+from fluxo_json import ler_registros
+from metricas import execucao
+
+# Agrupamento dos marcadores do mapa, pré-calculado por zoom: em cada nível as
+# instituições caem numa grade de células de TAMANHO_CELULA pixels (Web Mercator)
+# e cada célula ocupada vira um agrupamento. As grades são aninhadas (uma célula
+# do zoom z contém 2x2 células do zoom z+1), então os níveis formam uma pirâmide
+# e o mapa desenha no máximo uma feição por célula visível.
+
+# Faixa de zoom com agrupamentos (o mínimo é o minZoom do mapa); acima do
+# máximo o script.js mostra cada instituição. Mudar aqui exige mudar lá também.
+ZOOM_MINIMO_AGRUPAMENTO = 4
+ZOOM_MAXIMO_AGRUPAMENTO = 13
+
+# Lado da célula da grade, em pixels da tela
+TAMANHO_CELULA = 64
+
+# Lado de um tile do mapa, em pixels (2^zoom tiles por eixo)
+TAMANHO_TILE = 256
+
+# Latitude máxima da projeção Web Mercator
+LATITUDE_MAXIMA_MERCATOR = 85.05112878
+
+# Um arquivo por zoom, publicado junto com o painel
+DIRETORIO_AGRUPAMENTOS = os.path.join(RAIZ, 'agrupamentos')
+
+def caminho_agrupamentos(zoom, diretorio=DIRETORIO_AGRUPAMENTOS):
+    """Arquivo com os agrupamentos de um nível de zoom"""
+    return os.path.join(diretorio, f"z{zoom}.json")
+
+def caminhos_agrupamentos(diretorio=DIRETORIO_AGRUPAMENTOS):
+    """Arquivos de todos os níveis, do zoom mínimo ao máximo"""
+    return [caminho_agrupamentos(zoom, diretorio)
+            for zoom in range(ZOOM_MINIMO_AGRUPAMENTO, ZOOM_MAXIMO_AGRUPAMENTO + 1)]
+
+def celulas(latitudes, longitudes, zoom):
+    """Coluna e linha da célula da grade de cada ponto, no zoom dado"""
+    lat = np.radians(np.clip(np.asarray(latitudes, dtype=float), -LATITUDE_MAXIMA_MERCATOR, LATITUDE_MAXIMA_MERCATOR))
+    lon = np.asarray(longitudes, dtype=float)
+    escala = TAMANHO_TILE * 2 ** zoom / TAMANHO_CELULA
+
+    x = (lon + 180) / 360 * escala
+    y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * escala
+    return np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+
+def agrupar(latitudes, longitudes, zoom_minimo=ZOOM_MINIMO_AGRUPAMENTO, zoom_maximo=ZOOM_MAXIMO_AGRUPAMENTO):
+    """Agrupamentos de cada zoom: {zoom: [[latitude, longitude, [linhas]], ...]}
+
+    A posição é o centro médio dos membros; as linhas são as posições das
+    instituições no data.json. As células são calculadas uma vez no zoom
+    máximo e os níveis de cima saem por deslocamento de bits.
+    """
+    lat = np.asarray(latitudes, dtype=float)
+    lon = np.asarray(longitudes, dtype=float)
+    x, y = celulas(lat, lon, zoom_maximo)
+    linhas = np.arange(len(lat))
+
+    niveis = {}
+    for zoom in range(zoom_minimo, zoom_maximo + 1):
+        deslocamento = zoom_maximo - zoom
+        df = pd.DataFrame({'x': x >> deslocamento, 'y': y >> deslocamento, 'lat': lat, 'lon': lon, 'linha': linhas})
+        grupos = df.groupby(['x', 'y'], sort=True)
+
+        centros = grupos[['lat', 'lon']].mean().round(CASAS_COORDENADAS)
+        membros = grupos['linha'].apply(lambda serie: serie.tolist())
+        niveis[zoom] = [[la, lo, m] for la, lo, m in zip(centros['lat'], centros['lon'], membros)]
+
+    return niveis
+
+def gravar_agrupamentos(niveis, diretorio=DIRETORIO_AGRUPAMENTOS):
+    """Grava um arquivo por zoom (sem espaços, gravação atômica)"""
+    for zoom, agrupamentos in niveis.items():
+        caminho = caminho_agrupamentos(zoom, diretorio)
+        temporario = preparar_saida(caminho) + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(agrupamentos, f, separators=(',', ':'))
+        os.replace(temporario, caminho)
+
+def main():
+    # Gera os agrupamentos a partir de um data.json já existente (sem rodar o pipeline)
+    parser = argparse.ArgumentParser(description="Pré-calcula os agrupamentos de marcadores por zoom")
+    parser.add_argument('origem', nargs='?', default=CAMINHO_PAINEL,
+                        help="registros com coordenadas (padrão: data.json)")
+    parser.add_argument('diretorio', nargs='?', default=DIRETORIO_AGRUPAMENTOS,
+                        help="diretório dos arquivos por zoom (padrão: agrupamentos/)")
+    args = parser.parse_args()
+
+    registros = list(ler_registros(args.origem))
+    niveis = agrupar([r['latitude'] for r in registros], [r['longitude'] for r in registros])
+    gravar_agrupamentos(niveis, args.diretorio)
+
+    for zoom, agrupamentos in niveis.items():
+        print(f"zoom {zoom}: {len(agrupamentos)} agrupamentos")
+
+if __name__ == "__main__":
+    with execucao('agrupamento'):
+        main()
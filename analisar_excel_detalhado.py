@@ -1,10 +1,13 @@
 import pandas as pd
+from caminhos import CAMINHO_EXCEL
+from metricas import execucao
+from planilha import ler_planilha
 
 def analisar_excel_detalhado():
     """Analisa a estrutura detalhada do Excel"""
     
     print("Carregando Excel...")
-    df = pd.read_excel('/home/ubuntu/upload/BI_instituicoes_com_emails_confirmados.xlsx')
+    df = ler_planilha(CAMINHO_EXCEL)
     
     print(f"Total de linhas: {len(df)}")
     print(f"Colunas disponíveis: {list(df.columns)}")
@@ -39,5 +42,6 @@ def analisar_excel_detalhado():
             print(f"{col}: {valores_sample}")
 
 if __name__ == "__main__":
-    analisar_excel_detalhado()
+    with execucao('analisar_excel_detalhado'):
+        analisar_excel_detalhado()
 
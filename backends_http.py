@@ -0,0 +1,161 @@
+import base64
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Backends das sessões HTTP, escolhidos pela variável PAINEL_HTTP:
+#   rede (padrão)           sites reais e nominatim.openstreetmap.org
+#   local:<url>             tudo redirecionado para o servidor_local.py (ex: local:http://127.0.0.1:8800)
+#   gravar:<arquivo.jsonl>  rede, gravando cada resposta no arquivo
+#   fixtures:<arquivo.jsonl> só respostas gravadas, sem acessar a rede
+# Os chamadores continuam usando sessao.get(...) e a resposta de requests.
+
+VARIAVEL_BACKEND = 'PAINEL_HTTP'
+BACKEND_PADRAO = 'rede'
+
+def backend_configurado():
+    """Especificação do backend atual (tipo e argumento), ex: ('local', 'http://127.0.0.1:8800')"""
+    especificacao = os.environ.get(VARIAVEL_BACKEND, '').strip() or BACKEND_PADRAO
+    tipo, _, argumento = especificacao.partition(':')
+
+    if tipo not in ('rede', 'local', 'gravar', 'fixtures'):
+        raise ValueError(f"{VARIAVEL_BACKEND} inválido: {especificacao!r}")
+    if tipo != 'rede' and not argumento:
+        raise ValueError(f"{VARIAVEL_BACKEND}={tipo} requer um argumento ({tipo}:<...>)")
+
+    return tipo, argumento
+
+def url_completa(url, params=None):
+    """URL com a query string de params, como o requests montaria (chave das gravações)"""
+    return requests.Request('GET', url, params=params).prepare().url
+
+class SessaoLocal(requests.Session):
+    """Sessão que envia toda requisição ao servidor local, com o host original no caminho
+
+    https://www.ufrgs.br/contato vira <base>/www.ufrgs.br/contato. O chamador
+    continua vendo a URL original (links relativos e limites por host não mudam).
+    """
+
+    def __init__(self, url_base):
+        super().__init__()
+        self.url_base = url_base.rstrip('/')
+
+    def request(self, method, url, *args, **kwargs):
+        partes = urlsplit(url)
+        destino = f"{self.url_base}/{partes.netloc}{partes.path or '/'}"
+        if partes.query:
+            destino += f"?{partes.query}"
+
+        response = super().request(method, destino, *args, **kwargs)
+        response.url = url
+        return response
+
+class ArquivoFixtures:
+    """Respostas gravadas num arquivo JSONL, uma por URL (a última gravada vale)"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.lock = threading.Lock()
+        self.respostas = {}
+
+        if os.path.exists(caminho):
+            with open(caminho, encoding='utf-8') as f:
+                for linha in f:
+                    if linha.strip():
+                        registro = json.loads(linha)
+                        self.respostas[registro['url']] = registro
+
+    def obter(self, url):
+        return self.respostas.get(url)
+
+    def gravar(self, url, response):
+        registro = {
+            'url': url,
+            'status': response.status_code,
+            'headers': dict(response.headers),
+            'corpo': base64.b64encode(response.content).decode('ascii'),
+        }
+
+        with self.lock:
+            self.respostas[url] = registro
+            diretorio = os.path.dirname(self.caminho)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+            with open(self.caminho, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+class SessaoGravadora(requests.Session):
+    """Sessão de rede que grava cada resposta recebida (inclusive 4xx/5xx) nas fixtures"""
+
+    def __init__(self, fixtures):
+        super().__init__()
+        self.fixtures = fixtures
+
+    def request(self, method, url, params=None, *args, **kwargs):
+        response = super().request(method, url, params, *args, **kwargs)
+        # Respostas 304 dependem do cache de quem gravou; não servem para reproduzir
+        if response.status_code != 304:
+            self.fixtures.gravar(url_completa(url, params), response)
+        return response
+
+class SessaoFixtures:
+    """Sessão sem rede: responde com as gravações; URL sem gravação é erro de conexão
+
+    Cabeçalhos condicionais são ignorados (a resposta gravada sempre volta
+    completa), então o cache de páginas se comporta como num primeiro acesso.
+    """
+
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self.headers = CaseInsensitiveDict()
+        self.hooks = {'response': []}
+
+    def get(self, url, params=None, **kwargs):
+        completa = url_completa(url, params)
+        registro = self.fixtures.obter(completa)
+        if registro is None:
+            raise requests.ConnectionError(f"sem resposta gravada para {completa}")
+
+        response = requests.Response()
+        response.status_code = registro['status']
+        response.headers = CaseInsensitiveDict(registro['headers'])
+        response._content = base64.b64decode(registro['corpo'])
+        response.url = completa
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+
+        for hook in self.hooks['response']:
+            hook(response)
+        return response
+
+    def mount(self, prefixo, adapter):
+        pass
+
+    def close(self):
+        pass
+
+_fixtures = {}
+_lock = threading.Lock()
+
+def _obter_fixtures(caminho):
+    # Um arquivo de fixtures por processo, compartilhado por todas as sessões
+    caminho = os.path.abspath(caminho)
+    with _lock:
+        if caminho not in _fixtures:
+            _fixtures[caminho] = ArquivoFixtures(caminho)
+        return _fixtures[caminho]
+
+def nova_sessao():
+    """Sessão (ainda sem configuração de pool e retry) do backend escolhido em PAINEL_HTTP"""
+    tipo, argumento = backend_configurado()
+
+    if tipo == 'local':
+        return SessaoLocal(argumento)
+    if tipo == 'gravar':
+        return SessaoGravadora(_obter_fixtures(argumento))
+    if tipo == 'fixtures':
+        return SessaoFixtures(_obter_fixtures(argumento))
+    return requests.Session()
@@ -0,0 +1,98 @@
+import random
+import re
+import time
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from extracao_emails import PALAVRAS_CONTATO, extrair_emails_e_links
+from metricas import execucao
+
+def extrair_emails_do_texto(texto):
+    """Caminho anterior: extrai emails válidos de um texto usando regex"""
+    # Padrão regex para emails
+    padrao_email = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+    emails = re.findall(padrao_email, texto)
+    
+    # Filtrar emails válidos (remover imagens, etc.)
+    emails_validos = []
+    for email in emails:
+        if not any(ext in email.lower() for ext in ['.jpg', '.png', '.gif', '.pdf', '.doc']):
+            emails_validos.append(email.lower())
+    
+    return list(set(emails_validos))  # Remover duplicatas
+
+def extrair_com_beautifulsoup(conteudo, url_base):
+    """Caminho anterior: árvore DOM completa + get_text() + regex"""
+    soup = BeautifulSoup(conteudo, 'html.parser')
+    emails = extrair_emails_do_texto(soup.get_text())
+
+    links = []
+    for link in soup.find_all('a', href=True):
+        href = link['href'].lower()
+        texto_link = link.get_text().lower()
+
+        if any(palavra in href or palavra in texto_link for palavra in PALAVRAS_CONTATO):
+            links.append(urljoin(url_base, link['href']))
+
+    return emails, links
+
+def gerar_pagina(semente, paragrafos=150):
+    """Gera uma página institucional sintética (menu, notícias, rodapé com contatos)"""
+    aleatorio = random.Random(semente)
+    palavras = ['pesquisa', 'inovação', 'campus', 'edital', 'extensão', 'ensino', 'tecnologia', 'parque']
+
+    partes = ['<html><head><title>Instituição</title><script>var x = 1;</script></head><body>']
+    partes.append('<nav>')
+    for i in range(40):
+        partes.append(f'<a href="/secao/{i}">{aleatorio.choice(palavras).title()}</a>')
+    partes.append('<a href="/contato">Fale Conosco</a><a href="/sobre">Sobre</a></nav>')
+
+    for i in range(paragrafos):
+        texto = ' '.join(aleatorio.choice(palavras) for _ in range(40))
+        partes.append(f'<div class="noticia"><h2>Notícia {i}</h2><p>{texto}</p>'
+                      f'<img src="/img/foto{i}@2x.png"><a href="/noticias/{i}">Leia mais</a></div>')
+
+    partes.append(f'<footer><p>Contato: secretaria{semente}@instituicao.edu.br</p>\n'
+                  f'<a href="mailto:gabinete{semente}@instituicao.edu.br">Gabinete</a></footer>')
+    partes.append('</body></html>')
+
+    return ''.join(partes).encode('utf-8')
+
+def medir(funcao, paginas, repeticoes):
+    """Tempo médio por página (em ms) da melhor de algumas repetições"""
+    melhor = float('inf')
+
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for pagina in paginas:
+            funcao(pagina, 'https://instituicao.edu.br/')
+        melhor = min(melhor, time.perf_counter() - inicio)
+
+    return melhor / len(paginas) * 1000
+
+def benchmark_extracao_emails(quantidade=50, repeticoes=3):
+    """Compara a extração via BeautifulSoup com a varredura direta dos bytes"""
+    paginas = [gerar_pagina(i) for i in range(quantidade)]
+    tamanho_medio = sum(len(p) for p in paginas) / len(paginas) / 1024
+
+    # Os dois caminhos devem encontrar os mesmos links; o novo também lê o mailto:
+    # (o get_text() antigo cola nós de texto vizinhos, por isso o \n no rodapé)
+    for pagina in paginas[:5]:
+        emails_antigo, links_antigo = extrair_com_beautifulsoup(pagina, 'https://instituicao.edu.br/')
+        emails_novo, links_novo = extrair_emails_e_links(pagina, 'https://instituicao.edu.br/')
+        assert links_antigo == links_novo
+        assert set(emails_antigo) <= set(emails_novo)
+
+    tempo_antigo = medir(extrair_com_beautifulsoup, paginas, repeticoes)
+    tempo_novo = medir(extrair_emails_e_links, paginas, repeticoes)
+
+    print(f"=== BENCHMARK: EXTRAÇÃO DE EMAILS ===")
+    print(f"Páginas: {quantidade} (média de {tamanho_medio:.1f} KB)")
+    print(f"BeautifulSoup + get_text: {tempo_antigo:.2f} ms/página")
+    print(f"Varredura dos bytes:      {tempo_novo:.2f} ms/página")
+    print(f"Ganho: {tempo_antigo / tempo_novo:.1f}x")
+
+if __name__ == "__main__":
+    with execucao('benchmark_extracao_emails'):
+        benchmark_extracao_emails()
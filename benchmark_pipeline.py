@@ -0,0 +1,394 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import unicodedata
+from collections import Counter
+
+import pandas as pd
+
+# Benchmark das etapas do pipeline sobre planilhas sintéticas (300, 10 mil e 100
+# mil linhas): leitura do Excel, normalização, geocodificação (gazetteer + cache),
+# extração de emails de páginas HTML prontas e exportação do painel. Cada etapa
+# informa tempo, vazão e pico de memória; os resultados podem ser gravados como
+# linha de base e comparados nas próximas execuções para acusar regressões.
+#
+# Tudo roda num diretório de trabalho próprio (PAINEL_DADOS) e sem rede
+# (PAINEL_HTTP aponta para fixtures vazias): nada toca nos caches do projeto.
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# Tamanhos padrão das planilhas sintéticas
+TAMANHOS = (300, 10_000, 100_000)
+
+# Linha de base versionada junto com o código
+CAMINHO_LINHA_DE_BASE = os.path.join(RAIZ, 'benchmark_linha_de_base.json')
+
+# Diretório das planilhas geradas (reaproveitadas entre execuções) e dos caches da medição
+DIRETORIO_TRABALHO = os.path.join(tempfile.gettempdir(), 'painel-benchmark')
+
+# Formato das planilhas sintéticas; mudar o número gera as planilhas de novo
+VERSAO_GERADOR = 1
+
+# Regressão: mais lento que a base além da tolerância (e da folga absoluta, que
+# absorve o ruído das etapas de milissegundos) ou com pico de memória maior
+TOLERANCIA_TEMPO = 0.25
+FOLGA_TEMPO_SEGUNDOS = 0.05
+TOLERANCIA_MEMORIA = 0.20
+
+# Páginas distintas do corpus da extração (percorrido em ciclo, uma página por linha)
+PAGINAS_CORPUS = 500
+
+# Composição das cidades da planilha sintética
+FRACAO_OUTROS_ESTADOS = 0.08
+FRACAO_SEM_ACENTO = 0.15
+FRACAO_COM_UF = 0.10
+FRACAO_COM_ERRO = 0.08
+FRACAO_DESCONHECIDA = 0.03
+FRACAO_SEM_CIDADE = 0.02
+
+# Linhas com email na planilha; as demais vão para a busca nos sites
+FRACAO_COM_EMAIL = 0.35
+
+# Instituições por domínio (campi e unidades no mesmo site)
+LINHAS_POR_DOMINIO = 5
+
+TIPOS_INSTITUICAO = ['Universidade', 'Universidade Federal', 'Instituto Federal', 'Centro de Pesquisa',
+                     'Fundação', 'Instituto Embrapii', 'Parque Tecnológico', 'Incubadora']
+PALAVRAS_NOME = ['Tecnologia', 'Inovação', 'Ciências', 'Agropecuária', 'Saúde', 'Engenharia', 'Energia',
+                 'Alimentos', 'Materiais', 'Software', 'Biotecnologia', 'Regional']
+SETORES = ['Público', 'Privado', 'Misto', None]
+
+def _sem_acentos(texto):
+    return ''.join(c for c in unicodedata.normalize('NFD', texto) if not unicodedata.combining(c))
+
+def _com_erro(aleatorio, texto):
+    # Troca duas letras vizinhas (erro de digitação)
+    if len(texto) < 4:
+        return texto
+    i = aleatorio.randrange(1, len(texto) - 2)
+    return texto[:i] + texto[i + 1] + texto[i] + texto[i + 2:]
+
+def _municipios_por_uf():
+    por_uf = {}
+    with open(os.path.join(RAIZ, 'municipios_ibge.csv'), encoding='utf-8') as f:
+        for linha in csv.DictReader(f):
+            por_uf.setdefault(linha['uf'], []).append(linha['nome'])
+    return por_uf
+
+def gerar_planilha(linhas, semente=0):
+    """Planilha sintética com as colunas e as imperfeições da planilha real
+
+    Cidades do RS com e sem acento, com "/RS", com erro de digitação ou fora
+    do gazetteer; estados por extenso ou em sigla; células vazias; grupos de
+    instituições no mesmo domínio.
+    """
+    aleatorio = random.Random(semente)
+    por_uf = _municipios_por_uf()
+    outras_ufs = sorted(uf for uf in por_uf if uf != 'RS')
+    dominios = max(1, linhas // LINHAS_POR_DOMINIO)
+
+    registros = []
+    for i in range(linhas):
+        sorteio = aleatorio.random()
+        if sorteio < FRACAO_OUTROS_ESTADOS:
+            uf = aleatorio.choice(outras_ufs)
+            cidade, estado = aleatorio.choice(por_uf[uf]), uf
+        else:
+            cidade = aleatorio.choice(por_uf['RS'])
+            estado = aleatorio.choice(['Rio Grande do Sul', 'RS', 'rs'])
+            sorteio = aleatorio.random()
+            limite = 0.0
+            for fracao, variante in ((FRACAO_SEM_ACENTO, lambda c: _sem_acentos(c).lower()),
+                                     (FRACAO_COM_UF, lambda c: f"{c}/RS"),
+                                     (FRACAO_COM_ERRO, lambda c: _com_erro(aleatorio, c)),
+                                     (FRACAO_DESCONHECIDA, lambda c: f"Distrito Sintético {aleatorio.randrange(50)}"),
+                                     (FRACAO_SEM_CIDADE, lambda c: None)):
+                limite += fracao
+                if sorteio < limite:
+                    cidade = variante(cidade)
+                    break
+
+        tipo = aleatorio.choice(TIPOS_INSTITUICAO)
+        nome = f"{tipo} de {aleatorio.choice(PALAVRAS_NOME)} {i}"
+        abreviatura = ''.join(p[0] for p in nome.split() if p[0].isupper()) + str(i)
+        dominio = f"inst{aleatorio.randrange(dominios)}.edu.br"
+        site = f"https://{aleatorio.choice(['www', 'campus' + str(i % 7), 'portal'])}.{dominio}/"
+
+        registros.append({
+            'Cidade': cidade,
+            'Estado': estado,
+            'Abreviatura da Instituição': abreviatura,
+            'Nome da Instituição/Tipo': nome,
+            'Setor': aleatorio.choice(SETORES),
+            'Contato': None,
+            'Site': site,
+            'E-mail de contato': f"contato@{dominio}" if aleatorio.random() < FRACAO_COM_EMAIL else None,
+        })
+
+    return pd.DataFrame(registros)
+
+def caminho_planilha(linhas, semente, diretorio=DIRETORIO_TRABALHO):
+    return os.path.join(diretorio, f"planilha_{linhas}_s{semente}_v{VERSAO_GERADOR}.xlsx")
+
+def obter_planilha(linhas, semente, diretorio=DIRETORIO_TRABALHO):
+    """Caminho da planilha sintética, gerando o .xlsx só na primeira vez"""
+    caminho = caminho_planilha(linhas, semente, diretorio)
+    if not os.path.exists(caminho):
+        print(f"Gerando planilha sintética com {linhas} linhas...")
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = caminho + '.tmp.xlsx'
+        gerar_planilha(linhas, semente).to_excel(temporario, index=False)
+        os.replace(temporario, caminho)
+    return caminho
+
+class Etapa:
+    """Uma etapa medida: preparar(estado) fica fora da medição; executar(estado) retorna quantos itens processou"""
+
+    def __init__(self, nome, executar, preparar=None, unidade='linhas'):
+        self.nome = nome
+        self.executar = executar
+        self.preparar = preparar
+        self.unidade = unidade
+
+def leitura_excel(estado):
+    from planilha import ler_planilha
+
+    estado['bruto'] = ler_planilha(estado['planilha'], usar_snapshot=False)
+    return len(estado['bruto'])
+
+def normalizacao(estado):
+    from normalizacao import normalizar_planilha
+
+    estado['normalizado'] = normalizar_planilha(estado['bruto'])
+    return len(estado['normalizado'])
+
+def preparar_geocodificacao(estado):
+    # Cidades fora do gazetteer vão para o cache antes (a medição não consulta o Nominatim)
+    from geocodificacao import buscar_municipio_aproximado, geocodificar_em_lote, obter_cache_padrao
+    from normalizacao import CIDADE_NAO_INFORMADA
+
+    df = estado['normalizado']
+    com_cidade = df['Cidade'] != CIDADE_NAO_INFORMADA
+    cidades = df['Cidade'].str.split('/').str[0].str.strip()
+    pares = set(zip(cidades[com_cidade], df['Estado'][com_cidade]))
+
+    cache = obter_cache_padrao()
+    for (cidade, uf), resultado in geocodificar_em_lote(pares, usar_api=False).items():
+        if resultado[2] == 'nao_encontrada':
+            cache.salvar(cidade, uf, -30.0, -53.0)
+
+    # Sem memória das buscas aproximadas: cada medição resolve os nomes do zero
+    buscar_municipio_aproximado.cache_clear()
+
+def geocodificacao(estado):
+    from normalizacao import adicionar_coordenadas
+
+    estado['geocodificado'] = adicionar_coordenadas(estado['normalizado'], apenas_rs=False)
+    return len(estado['geocodificado'])
+
+def preparar_extracao(estado):
+    from servidor_local import pagina_site
+
+    if 'corpus' not in estado:
+        paginas = []
+        for i in range(PAGINAS_CORPUS):
+            host, caminho = f"www.inst{i}.edu.br", ('/', '/contato', '/sobre', '/noticias/1')[i % 4]
+            paginas.append((f"https://{host}{caminho}", pagina_site(host, caminho)))
+        estado['corpus'] = paginas
+
+def extracao_emails(estado):
+    from classificacao_emails import classificar_emails
+    from extracao_emails import extrair_emails_e_links
+
+    corpus = estado['corpus']
+    total = len(estado['normalizado'])
+    for i in range(total):
+        url, pagina = corpus[i % len(corpus)]
+        emails, _ = extrair_emails_e_links(pagina, url)
+        classificar_emails(Counter(emails), url)
+    return total
+
+def preparar_exportacao(estado):
+    from normalizacao import para_registros
+
+    estado['registros'] = para_registros(estado['geocodificado'])
+
+def exportacao(estado):
+    from agrupamento import agrupar, gravar_agrupamentos
+    from exportacao import PainelCompacto, montar_painel, salvar_painel, salvar_painel_compacto
+
+    diretorio = estado['saida']
+    compacto = PainelCompacto()
+    total = salvar_painel(compacto.registrar(montar_painel(estado['registros'])), os.path.join(diretorio, 'data.json'))
+    salvar_painel_compacto(compacto, os.path.join(diretorio, 'data.min.json'))
+    gravar_agrupamentos(agrupar(compacto.colunas['latitude'], compacto.colunas['longitude']),
+                        os.path.join(diretorio, 'agrupamentos'))
+    return total
+
+ETAPAS = [
+    Etapa('leitura_excel', leitura_excel),
+    Etapa('normalizacao', normalizacao),
+    Etapa('geocodificacao', geocodificacao, preparar_geocodificacao),
+    Etapa('extracao_emails', extracao_emails, preparar_extracao, unidade='páginas'),
+    Etapa('exportacao', exportacao, preparar_exportacao),
+]
+
+def medir(etapa, estado, repeticoes=1, memoria=True):
+    """Melhor tempo entre as repetições e, numa execução à parte com tracemalloc, o pico de memória"""
+    melhor = float('inf')
+    itens = 0
+
+    for _ in range(repeticoes):
+        if etapa.preparar:
+            etapa.preparar(estado)
+        inicio = time.perf_counter()
+        itens = etapa.executar(estado)
+        melhor = min(melhor, time.perf_counter() - inicio)
+
+    resultado = {'segundos': round(melhor, 4), 'itens': itens, 'itens_por_segundo': round(itens / melhor, 1)}
+
+    # O tracemalloc deixa o código mais lento: o tempo sai só das execuções sem ele
+    if memoria:
+        if etapa.preparar:
+            etapa.preparar(estado)
+        tracemalloc.start()
+        try:
+            etapa.executar(estado)
+            resultado['pico_memoria_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        finally:
+            tracemalloc.stop()
+
+    return resultado
+
+def comparar(resultado, base):
+    """Regressões de um resultado em relação à linha de base (lista de textos; vazia se não houve)"""
+    regressoes = []
+
+    limite = base['segundos'] * (1 + TOLERANCIA_TEMPO) + FOLGA_TEMPO_SEGUNDOS
+    if resultado['segundos'] > limite:
+        regressoes.append(f"tempo {resultado['segundos']:.3f}s > {base['segundos']:.3f}s")
+
+    if 'pico_memoria_mb' in resultado and 'pico_memoria_mb' in base:
+        if resultado['pico_memoria_mb'] > base['pico_memoria_mb'] * (1 + TOLERANCIA_MEMORIA):
+            regressoes.append(f"memória {resultado['pico_memoria_mb']:.1f} MB > {base['pico_memoria_mb']:.1f} MB")
+
+    return regressoes
+
+def carregar_linha_de_base(caminho=CAMINHO_LINHA_DE_BASE):
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f).get('resultados', {})
+
+def salvar_linha_de_base(resultados, caminho=CAMINHO_LINHA_DE_BASE):
+    """Grava os resultados como nova linha de base (tamanhos não medidos agora são mantidos)"""
+    combinados = carregar_linha_de_base(caminho)
+    combinados.update(resultados)
+
+    dados = {
+        'maquina': f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'resultados': dict(sorted(combinados.items(), key=lambda item: int(item[0]))),
+    }
+
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    os.replace(temporario, caminho)
+
+def aquecer():
+    """Importa os módulos e carrega o gazetteer antes das medições (não entram no tempo da primeira etapa)"""
+    import agrupamento, classificacao_emails, exportacao, extracao_emails, planilha, servidor_local  # noqa: F401
+    from geocodificacao import obter_municipios
+    from normalizacao import normalizar_planilha
+
+    obter_municipios()
+    normalizar_planilha(gerar_planilha(10))
+
+def executar_benchmark(tamanhos=TAMANHOS, repeticoes=1, memoria=True, semente=0, diretorio=DIRETORIO_TRABALHO,
+                       etapas=None):
+    """Mede as etapas em cada tamanho; retorna {tamanho: {etapa: resultado}}"""
+    selecionadas = [e for e in ETAPAS if not etapas or e.nome in etapas]
+    resultados = {}
+    aquecer()
+
+    for linhas in tamanhos:
+        estado = {'planilha': obter_planilha(linhas, semente, diretorio), 'saida': os.path.join(diretorio, f"saida_{linhas}")}
+        resultados[str(linhas)] = {}
+
+        # As etapas dependem das anteriores: as não selecionadas rodam sem medição
+        for etapa in ETAPAS:
+            if etapa not in selecionadas:
+                if etapa.preparar:
+                    etapa.preparar(estado)
+                etapa.executar(estado)
+                continue
+            resultados[str(linhas)][etapa.nome] = medir(etapa, estado, repeticoes, memoria)
+            resultados[str(linhas)][etapa.nome]['unidade'] = etapa.unidade
+
+    return resultados
+
+def configurar_ambiente(diretorio):
+    """Caches num diretório próprio e nenhum acesso à rede (antes de importar os módulos do projeto)"""
+    os.environ['PAINEL_DADOS'] = os.path.join(diretorio, 'dados')
+    os.environ['PAINEL_HTTP'] = 'fixtures:' + os.path.join(diretorio, 'sem_rede.jsonl')
+
+    # Cache de geocodificação zerado a cada execução
+    cache = os.path.join(diretorio, 'dados', 'cache_geocodificacao.sqlite')
+    if os.path.exists(cache):
+        os.remove(cache)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do pipeline com planilhas sintéticas")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS),
+                        help="linhas das planilhas (padrão: 300 10000 100000)")
+    parser.add_argument('--etapas', nargs='+', choices=[e.nome for e in ETAPAS], help="mede só estas etapas")
+    parser.add_argument('--repeticoes', type=int, default=1, help="execuções cronometradas por etapa (vale a melhor)")
+    parser.add_argument('--sem-memoria', action='store_true', help="não mede o pico de memória (mais rápido)")
+    parser.add_argument('--semente', type=int, default=0, help="semente das planilhas sintéticas")
+    parser.add_argument('--diretorio', default=DIRETORIO_TRABALHO, help="planilhas geradas e caches da medição")
+    parser.add_argument('--linha-de-base', default=CAMINHO_LINHA_DE_BASE, help="arquivo da linha de base")
+    parser.add_argument('--salvar-linha-de-base', action='store_true', help="grava os resultados como nova linha de base")
+    args = parser.parse_args()
+
+    configurar_ambiente(args.diretorio)
+    resultados = executar_benchmark(args.tamanhos, args.repeticoes, not args.sem_memoria, args.semente,
+                                    args.diretorio, args.etapas)
+    base = carregar_linha_de_base(args.linha_de_base)
+
+    print("=== BENCHMARK: PIPELINE ===")
+    regressoes = []
+    for linhas, por_etapa in resultados.items():
+        print(f"\n{int(linhas):,} linhas".replace(',', '.'))
+        print(f"  {'etapa':<18}{'tempo':>10}{'vazão':>22}{'memória':>12}  linha de base")
+        for nome, resultado in por_etapa.items():
+            memoria = f"{resultado['pico_memoria_mb']:.1f} MB" if 'pico_memoria_mb' in resultado else '-'
+            vazao = f"{resultado['itens_por_segundo']:,.0f} {resultado['unidade']}/s".replace(',', '.')
+            referencia = base.get(linhas, {}).get(nome)
+            if referencia is None:
+                situacao = 'sem referência'
+            else:
+                problemas = comparar(resultado, referencia)
+                variacao = resultado['segundos'] / referencia['segundos'] - 1 if referencia['segundos'] else 0.0
+                situacao = f"{variacao:+.0%}" + (f"  ⚠️ {'; '.join(problemas)}" if problemas else '')
+                regressoes.extend(f"{nome} @ {linhas}: {p}" for p in problemas)
+            print(f"  {nome:<18}{resultado['segundos']:>9.3f}s{vazao:>22}{memoria:>12}  {situacao}")
+
+    if args.salvar_linha_de_base:
+        salvar_linha_de_base(resultados, args.linha_de_base)
+        print(f"\nLinha de base gravada em {args.linha_de_base}")
+    elif regressoes:
+        print(f"\n⚠️ {len(regressoes)} regressões em relação à linha de base")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,137 +1,227 @@
-import json
-import requests
-from bs4 import BeautifulSoup
-import re
+import argparse
+import threading
 import time
-import csv
-from urllib.parse import urljoin, urlparse
+from collections import Counter
+from cache_http import obter_cache_paginas
+from caminhos import CAMINHO_DIARIO_EMAILS, CAMINHO_EMAILS, CAMINHO_INSTITUICOES, preparar_saida
+from classificacao_emails import VerificadorMX, classificar_emails, emails_aceitos
+from extracao_emails import extrair_ancoras, extrair_emails
+from fluxo_json import gravar_registros, ler_registros
+from fronteira import (ORCAMENTO_PAGINAS, PALAVRAS_FRONTEIRA, FronteiraSite, dominio_registravel, email_institucional,
+                      normalizar_url)
+from metricas import contar, cronometro, execucao
+from rastreamento import IDADE_MAXIMA_DIARIO, DiarioRastreamento, LimitadorPorHost, host_da_url, rastrear_em_paralelo
+from sessao_http import sessao_crawler
 
-def extrair_emails_do_texto(texto):
-    """Extrai emails válidos de um texto usando regex"""
-    # Padrão regex para emails
-    padrao_email = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    emails = re.findall(padrao_email, texto)
-    
-    # Filtrar emails válidos (remover imagens, etc.)
-    emails_validos = []
-    for email in emails:
-        if not any(ext in email.lower() for ext in ['.jpg', '.png', '.gif', '.pdf', '.doc']):
-            emails_validos.append(email.lower())
-    
-    return list(set(emails_validos))  # Remover duplicatas
+# Diário da busca de emails (permite retomar execuções interrompidas)
+CAMINHO_DIARIO = CAMINHO_DIARIO_EMAILS
 
-def buscar_emails_no_site(url, timeout=10):
-    """Busca emails em um site específico"""
-    emails_encontrados = []
+# Limitador usado quando nenhum é informado (chamadas avulsas)
+_limitador_padrao = LimitadorPorHost()
+
+def _baixar_pagina(pagina, sessao, cache, limitador, timeout, paginas_compartilhadas=None):
+    # Com paginas_compartilhadas, cada URL (normalizada) é baixada ou falha uma vez só por grupo
+    chave = normalizar_url(pagina)
+    if paginas_compartilhadas is not None and chave in paginas_compartilhadas:
+        contar('emails.paginas_compartilhadas')
+        conteudo = paginas_compartilhadas[chave]
+    else:
+        try:
+            with cronometro('emails.espera_limitador'):
+                limitador.aguardar(pagina)
+            with cronometro('emails.download'):
+                conteudo = cache.obter(sessao, pagina, timeout=timeout)
+            contar('emails.paginas')
+        except Exception as e:
+            contar('emails.erros_pagina')
+            conteudo = e
+        if paginas_compartilhadas is not None:
+            paginas_compartilhadas[chave] = conteudo
+
+    if isinstance(conteudo, Exception):
+        raise conteudo
+    return conteudo
+
+def visitar_site(url, timeout=10, limitador=None, cache=None, orcamento=ORCAMENTO_PAGINAS,
+                 paginas_compartilhadas=None):
+    """Busca emails em um site; erros ao acessar a página principal são propagados
+
+    As páginas são visitadas por prioridade (páginas de contato rasas primeiro),
+    até esgotar o orçamento ou encontrar um email do domínio do próprio site.
+    Retorna um Counter {email: número de páginas em que apareceu}.
+
+    paginas_compartilhadas (dict url -> conteúdo ou erro) guarda as páginas
+    já baixadas por outros sites do mesmo domínio: cada página comum (contato
+    da reitoria, rodapé do portal) é baixada uma vez só para o grupo.
+    """
+    paginas_por_email = Counter()
     
-    try:
-        # Configurar headers para parecer um navegador real
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        # Tentar acessar a página principal
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
+    # O limitador espaça as requisições ao mesmo host (substitui as pausas fixas)
+    if limitador is None:
+        limitador = _limitador_padrao
+    
+    # Páginas já baixadas são apenas revalidadas (ETag/Last-Modified)
+    if cache is None:
+        cache = obter_cache_paginas()
+    
+    # Sessão compartilhada: conexões keep-alive reaproveitadas entre páginas do mesmo host
+    sessao = sessao_crawler()
+    
+    fronteira = FronteiraSite(url, orcamento=orcamento)
+    
+    while True:
+        proxima = fronteira.proxima()
+        if proxima is None:
+            break
+        pagina, profundidade = proxima
         
-        # Buscar emails na página principal
-        texto_pagina = soup.get_text()
-        emails_encontrados.extend(extrair_emails_do_texto(texto_pagina))
+        try:
+            conteudo = _baixar_pagina(pagina, sessao, cache, limitador, timeout, paginas_compartilhadas)
+        except Exception as e:
+            # Sem a página principal não há o que rastrear
+            if profundidade == 0:
+                raise
+            print(f"Erro ao acessar página de contato {pagina}: {e}")
+            continue
         
-        # Buscar links para páginas de contato
-        links_contato = []
-        for link in soup.find_all('a', href=True):
-            href = link['href'].lower()
-            texto_link = link.get_text().lower()
-            
-            if any(palavra in href or palavra in texto_link for palavra in 
-                   ['contato', 'contact', 'fale', 'sobre', 'about', 'equipe', 'team']):
-                url_completa = urljoin(url, link['href'])
-                links_contato.append(url_completa)
+        # Emails (inclusive mailto: e ofuscados) e links candidatos em uma varredura dos bytes
+        with cronometro('emails.extracao'):
+            emails_pagina = extrair_emails(conteudo)
+        paginas_por_email.update(emails_pagina)
         
-        # Visitar páginas de contato (máximo 3)
-        for link_contato in links_contato[:3]:
-            try:
-                response_contato = requests.get(link_contato, headers=headers, timeout=timeout)
-                response_contato.raise_for_status()
-                
-                soup_contato = BeautifulSoup(response_contato.content, 'html.parser')
-                texto_contato = soup_contato.get_text()
-                emails_encontrados.extend(extrair_emails_do_texto(texto_contato))
-                
-                time.sleep(1)  # Pausa entre requisições
-                
-            except Exception as e:
-                print(f"Erro ao acessar página de contato {link_contato}: {e}")
-                continue
+        # Um endereço do próprio domínio encerra a busca no site
+        if any(email_institucional(email, url) for email in emails_pagina):
+            break
         
-        # Remover duplicatas e retornar
-        return list(set(emails_encontrados))
+        with cronometro('emails.extracao'):
+            ancoras = extrair_ancoras(conteudo, pagina, PALAVRAS_FRONTEIRA)
+        fronteira.adicionar_links(ancoras, profundidade)
+    
+    return paginas_por_email
+
+def buscar_emails_no_site(url, timeout=10, limitador=None):
+    """Busca emails em um site específico; retorna os aceitos, do melhor para o pior"""
+    try:
+        return emails_aceitos(classificar_emails(visitar_site(url, timeout=timeout, limitador=limitador), url))
         
     except Exception as e:
         print(f"Erro ao acessar {url}: {e}")
         return []
 
-def processar_instituicoes():
-    """Processa todas as instituições sem email"""
-    
-    # Carregar dados
-    with open('/home/ubuntu/instituicoes_data.json', 'r', encoding='utf-8') as f:
-        instituicoes = json.load(f)
+def processar_instituicoes(caminho_diario=CAMINHO_DIARIO, caminho_instituicoes=CAMINHO_INSTITUICOES,
+                           caminho_saida=CAMINHO_EMAILS, verificador_mx=None, recomecar=False,
+                           idade_maxima=IDADE_MAXIMA_DIARIO):
+    """Processa todas as instituições sem email
+
+    O progresso é gravado no diário a cada site; uma nova execução retoma de
+    onde parou, pulando sites concluídos há menos de idade_maxima segundos e
+    repetindo os que falharam. Com recomecar, todos os sites são rastreados
+    de novo (os registros antigos valem até cada site ser substituído).
+
+    Os emails de cada site são classificados (classificacao_emails): em
+    emails_encontrados ficam só os aceitos, do melhor para o pior, e em
+    candidatos todos, com pontuação e motivos, para revisão.
+    """
     
-    # Filtrar instituições sem email
+    # Filtrar instituições sem email (lidas uma a uma, sem carregar o arquivo inteiro)
     sem_email = []
-    for inst in instituicoes:
+    for inst in ler_registros(caminho_instituicoes):
         email_atual = inst.get('E-mail de contato', '').strip()
         site = inst.get('Site', '').strip()
         
         if site and not email_atual:
             sem_email.append(inst)
     
+    diario = DiarioRastreamento(preparar_saida(caminho_diario))
+    
+    # Sites únicos ainda não concluídos em execuções anteriores
+    sites = list(dict.fromkeys(inst.get('Site', '').strip() for inst in sem_email))
+    pendentes = sites if recomecar else [site for site in sites if not diario.concluido(site, idade_maxima)]
+    
+    # Campi e unidades no mesmo domínio (ifsul.edu.br, embrapii.org.br) formam um grupo
+    grupos = {}
+    for site in pendentes:
+        grupos.setdefault(dominio_registravel(host_da_url(site)), []).append(site)
+    
     print(f"Processando {len(sem_email)} instituições sem email...")
+    print(f"Sites já concluídos: {len(sites) - len(pendentes)}, pendentes: {len(pendentes)} em {len(grupos)} domínios")
     
-    # Arquivo para salvar resultados
-    resultados = []
+    # Grupos em paralelo; os sites de um grupo rodam em sequência na mesma thread,
+    # reaproveitando as páginas comuns. O limitador mantém a cortesia por host.
+    limitador = LimitadorPorHost()
+    interrompido = threading.Event()
+    lock_progresso = threading.Lock()
+    concluidos = []
+    inicio = time.perf_counter()
     
-    for i, instituicao in enumerate(sem_email):
-        nome = instituicao.get('Nome da Instituição/Tipo', 'N/A')
-        site = instituicao.get('Site', '')
-        cidade = instituicao.get('Cidade', '')
-        
-        print(f"\n[{i+1}/{len(sem_email)}] Processando: {nome}")
-        print(f"Site: {site}")
+    def processar(site, paginas_compartilhadas):
+        try:
+            paginas_por_email = visitar_site(site, limitador=limitador, paginas_compartilhadas=paginas_compartilhadas)
+        except Exception as e:
+            print(f"Erro ao acessar {site}: {e}")
+            return {'site': site, 'emails_encontrados': [], 'candidatos': [], 'status': 'erro', 'erro': str(e)}
         
-        emails = buscar_emails_no_site(site)
-        
-        resultado = {
-            'nome': nome,
-            'cidade': cidade,
+        with cronometro('emails.classificacao'):
+            candidatos = classificar_emails(paginas_por_email, site, verificador_mx)
+        emails = emails_aceitos(candidatos)
+        return {
             'site': site,
             'emails_encontrados': emails,
+            'candidatos': [c.como_dict() for c in candidatos],
             'status': 'sucesso' if emails else 'sem_email'
         }
+    
+    def processar_grupo(sites_grupo):
+        paginas_compartilhadas = {}
+        for site in sites_grupo:
+            # Depois de um Ctrl-C, o grupo para no site atual em vez de seguir até o fim
+            if interrompido.is_set():
+                break
+            concluir(site, processar(site, paginas_compartilhadas))
+    
+    def concluir(site, resultado):
+        # Checkpoint O(1) assim que o site termina, na própria thread: uma
+        # interrupção perde só os sites em andamento, não o resto do grupo
+        diario.registrar(resultado)
+        contar(f"emails.sites.{resultado['status']}")
         
-        resultados.append(resultado)
-        
-        if emails:
-            print(f"✅ Emails encontrados: {', '.join(emails)}")
-        else:
-            print("❌ Nenhum email encontrado")
-        
-        # Pausa entre requisições para não sobrecarregar os servidores
-        time.sleep(2)
+        with lock_progresso:
+            concluidos.append(resultado)
+            decorrido = time.perf_counter() - inicio
+            print(f"\n[{len(concluidos)}/{len(pendentes)}] Processado: {site} "
+                  f"({decorrido:.0f}s, {len(concluidos) / decorrido:.2f} sites/s)")
+            
+            if resultado['emails_encontrados']:
+                print(f"✅ Emails encontrados: {', '.join(resultado['emails_encontrados'])}")
+            elif resultado['status'] == 'erro':
+                print("⚠️ Erro (será repetido na próxima execução)")
+            else:
+                print("❌ Nenhum email encontrado")
+    
+    try:
+        rastrear_em_paralelo(list(grupos.values()), processar_grupo, interrompido=interrompido)
+        # Só depois de um rastreamento completo: interrompido, o diário fica como está
+        diario.compactar()
+    finally:
+        diario.fechar()
+    
+    # Montar resultados finais a partir do diário (na ordem original)
+    resultados = []
+    for inst in sem_email:
+        site = inst.get('Site', '').strip()
+        registro = diario.registros.get(site, {})
         
-        # Salvar progresso a cada 10 instituições
-        if (i + 1) % 10 == 0:
-            with open('/home/ubuntu/emails_encontrados_temp.json', 'w', encoding='utf-8') as f:
-                json.dump(resultados, f, ensure_ascii=False, indent=2)
-            print(f"Progresso salvo: {i+1}/{len(sem_email)}")
+        resultados.append({
+            'nome': inst.get('Nome da Instituição/Tipo', 'N/A'),
+            'cidade': inst.get('Cidade', ''),
+            'site': site,
+            'emails_encontrados': registro.get('emails_encontrados', []),
+            'candidatos': registro.get('candidatos', []),
+            'status': registro.get('status', 'erro')
+        })
     
     # Salvar resultados finais
-    with open('/home/ubuntu/emails_encontrados.json', 'w', encoding='utf-8') as f:
-        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    gravar_registros(resultados, caminho_saida)
     
     # Criar relatório
     total_com_email = len([r for r in resultados if r['emails_encontrados']])
@@ -139,8 +229,24 @@ def processar_instituicoes():
     print(f"Total processado: {len(resultados)}")
     print(f"Com email encontrado: {total_com_email}")
     print(f"Sem email: {len(resultados) - total_com_email}")
-    print(f"Taxa de sucesso: {total_com_email/len(resultados)*100:.1f}%")
+    print(f"Com erro (repetir): {len([r for r in resultados if r['status'] == 'erro'])}")
+    if resultados:
+        print(f"Taxa de sucesso: {total_com_email/len(resultados)*100:.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca emails nos sites das instituições sem email na planilha")
+    parser.add_argument('--verificar-mx', action='store_true',
+                        help="descarta emails de domínios sem registro MX (requer dnspython; resultados em cache)")
+    parser.add_argument('--recomecar', action='store_true',
+                        help="rastreia todos os sites de novo, ignorando o diário de execuções anteriores")
+    parser.add_argument('--idade-maxima-dias', type=float, default=IDADE_MAXIMA_DIARIO / 86400,
+                        help=f"rastreia de novo os sites concluídos há mais dias que isso (padrão: {IDADE_MAXIMA_DIARIO // 86400})")
+    args = parser.parse_args()
+
+    with execucao('buscar_emails'):
+        processar_instituicoes(verificador_mx=VerificadorMX() if args.verificar_mx else None,
+                               recomecar=args.recomecar, idade_maxima=args.idade_maxima_dias * 86400)
 
 if __name__ == "__main__":
-    processar_instituicoes()
+    main()
 
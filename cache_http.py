@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import threading
+import time
+from caminhos import CAMINHO_CACHE_PAGINAS
+from metricas import contar
+
+# Tamanho máximo somado dos corpos armazenados; acima disso, remove os menos usados
+TAMANHO_MAXIMO = 200 * 1024 * 1024
+
+_cache_padrao = None
+_lock_padrao = threading.Lock()
+
+class CachePaginas:
+    """Cache HTTP em disco com revalidação condicional e descarte LRU por tamanho"""
+
+    def __init__(self, caminho=CAMINHO_CACHE_PAGINAS, tamanho_maximo=TAMANHO_MAXIMO):
+        self.caminho = caminho
+        self.tamanho_maximo = tamanho_maximo
+        self.lock = threading.Lock()
+
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        # Conexão única protegida por lock (usada pelas threads do crawler)
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS paginas (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                corpo BLOB,
+                tamanho INTEGER,
+                acessado_em REAL
+            )
+        """)
+        self.conexao.execute("CREATE INDEX IF NOT EXISTS idx_paginas_acesso ON paginas (acessado_em)")
+        self.conexao.commit()
+
+        self.tamanho_total = self.conexao.execute(
+            "SELECT COALESCE(SUM(tamanho), 0) FROM paginas"
+        ).fetchone()[0]
+
+    def _buscar(self, url):
+        with self.lock:
+            return self.conexao.execute(
+                "SELECT etag, last_modified, corpo FROM paginas WHERE url = ?", (url,)
+            ).fetchone()
+
+    def _tocar(self, url):
+        with self.lock:
+            self.conexao.execute("UPDATE paginas SET acessado_em = ? WHERE url = ?", (time.time(), url))
+            self.conexao.commit()
+
+    def _salvar(self, url, etag, last_modified, corpo):
+        with self.lock:
+            anterior = self.conexao.execute(
+                "SELECT tamanho FROM paginas WHERE url = ?", (url,)
+            ).fetchone()
+            if anterior is not None:
+                self.tamanho_total -= anterior[0]
+
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO paginas VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, corpo, len(corpo), time.time())
+            )
+            self.tamanho_total += len(corpo)
+
+            # Descartar as páginas acessadas há mais tempo até caber no limite
+            while self.tamanho_total > self.tamanho_maximo:
+                linha = self.conexao.execute(
+                    "SELECT url, tamanho FROM paginas ORDER BY acessado_em LIMIT 1"
+                ).fetchone()
+                if linha is None:
+                    break
+                self.conexao.execute("DELETE FROM paginas WHERE url = ?", (linha[0],))
+                self.tamanho_total -= linha[1]
+
+            self.conexao.commit()
+
+    def obter(self, sessao, url, timeout=10):
+        """Baixa uma página (ou revalida a cópia em cache) e retorna o corpo em bytes
+
+        Erros HTTP são propagados como exceções de requests.
+        """
+        em_cache = self._buscar(url)
+
+        # Requisição condicional quando há cópia com validadores
+        headers = {}
+        if em_cache is not None:
+            etag, last_modified, _ = em_cache
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        response = sessao.get(url, headers=headers, timeout=timeout)
+
+        if response.status_code == 304 and em_cache is not None:
+            contar('cache_paginas.acertos')
+            self._tocar(url)
+            return em_cache[2]
+
+        contar('cache_paginas.falhas')
+
+        response.raise_for_status()
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+
+        # Sem validadores não há como revalidar depois; não vale guardar
+        if etag or last_modified:
+            self._salvar(url, etag, last_modified, response.content)
+
+        return response.content
+
+    def fechar(self):
+        self.conexao.close()
+
+def obter_cache_paginas():
+    """Retorna o cache de páginas compartilhado, abrindo-o na primeira chamada"""
+    global _cache_padrao
+
+    with _lock_padrao:
+        if _cache_padrao is None:
+            _cache_padrao = CachePaginas()
+
+    return _cache_padrao
@@ -0,0 +1,49 @@
+import os
+
+# Raiz do projeto (onde ficam a planilha, o gazetteer e os arquivos do painel)
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# Arquivos intermediários e caches do pipeline (pode ser trocado pela variável PAINEL_DADOS)
+DIRETORIO_DADOS = os.environ.get('PAINEL_DADOS', os.path.join(RAIZ, 'dados'))
+
+def caminho_dados(nome):
+    """Caminho de um arquivo no diretório de dados do pipeline"""
+    return os.path.join(DIRETORIO_DADOS, nome)
+
+def preparar_saida(caminho):
+    """Cria o diretório de um arquivo de saída, se necessário, e retorna o caminho"""
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    return caminho
+
+# Entrada original e saída publicada no painel
+CAMINHO_EXCEL = os.path.join(RAIZ, 'BI_instituicoes_com_emails_confirmados.xlsx')
+CAMINHO_PAINEL = os.path.join(RAIZ, 'data.json')
+# Mesmo conteúdo em colunas, com tabelas de valores e facetas (carregado primeiro pelo script.js)
+CAMINHO_PAINEL_COMPACTO = os.path.join(RAIZ, 'data.min.json')
+
+# Etapas intermediárias
+CAMINHO_INSTITUICOES = caminho_dados('instituicoes_data.json')
+CAMINHO_NORMALIZADAS = caminho_dados('instituicoes_normalizadas.json')
+CAMINHO_GEOCODIFICADAS = caminho_dados('instituicoes_geocodificadas.json')
+CAMINHO_ESPALHADAS = caminho_dados('instituicoes_espalhadas.json')
+CAMINHO_EMAILS = caminho_dados('emails_encontrados.json')
+
+# Painel gerado pelo pipeline a partir da planilha. Fica em dados/ porque o
+# data.json publicado na raiz é curado à mão (tem instituições que a planilha
+# não tem); publicar é copiar estes arquivos para a raiz depois de revisá-los.
+DIRETORIO_PAINEL_GERADO = caminho_dados('painel')
+CAMINHO_PAINEL_GERADO = os.path.join(DIRETORIO_PAINEL_GERADO, 'data.json')
+CAMINHO_PAINEL_COMPACTO_GERADO = os.path.join(DIRETORIO_PAINEL_GERADO, 'data.min.json')
+DIRETORIO_AGRUPAMENTOS_GERADOS = os.path.join(DIRETORIO_PAINEL_GERADO, 'agrupamentos')
+
+# Caches e diários
+CAMINHO_CACHE_GEOCODIFICACAO = caminho_dados('cache_geocodificacao.sqlite')
+CAMINHO_CACHE_PAGINAS = caminho_dados('cache_paginas.sqlite')
+CAMINHO_CACHE_MX = caminho_dados('cache_mx.sqlite')
+CAMINHO_DIARIO_EMAILS = caminho_dados('emails_diario.jsonl')
+CAMINHO_ESTADO_PIPELINE = caminho_dados('pipeline_estado.json')
+
+# Uma linha JSON por execução de script, com cronômetros e contadores (metricas.py)
+CAMINHO_METRICAS = caminho_dados('metricas.jsonl')
@@ -0,0 +1,242 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from caminhos import CAMINHO_CACHE_MX
+from fronteira import email_institucional
+from metricas import contar
+
+try:
+    import dns.exception
+    import dns.resolver
+except ImportError:  # dnspython é opcional: sem ele a verificação de MX fica desligada
+    dns = None
+
+# Classificação dos emails encontrados num site: validação de sintaxe estrita,
+# pontuação (domínio da instituição, palavras de função no endereço, páginas em
+# que apareceu) e, opcionalmente, verificação de MX do domínio com cache local.
+
+# Sintaxe aceita: parte local "dot-atom" e domínio com rótulos válidos e TLD alfabético
+PADRAO_EMAIL_ESTRITO = re.compile(
+    r"^[a-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[a-z0-9!#$%&'*+/=?^_`{|}~-]+)*"
+    r"@(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,24}$"
+)
+TAMANHO_MAXIMO_LOCAL = 64
+TAMANHO_MAXIMO_EMAIL = 254
+
+# "TLDs" que são extensões de arquivo (ex: logo@2x.png, sprite@3x.webp)
+EXTENSOES_ARQUIVO = {'png', 'jpg', 'jpeg', 'gif', 'svg', 'webp', 'bmp', 'ico', 'pdf', 'doc', 'docx',
+                     'xls', 'xlsx', 'css', 'js', 'json', 'xml', 'zip', 'mp4', 'webm'}
+
+# Domínios de exemplo, usados em placeholders de formulários
+DOMINIOS_FICTICIOS = {'example.com', 'example.org', 'exemplo.com', 'exemplo.com.br', 'dominio.com',
+                      'dominio.com.br', 'seudominio.com.br', 'email.com', 'empresa.com.br'}
+
+# Domínios de fornecedores que aparecem no HTML de terceiros (construtores de sites, monitoramento)
+DOMINIOS_FORNECEDORES = {'sentry.io', 'wixpress.com', 'sentry-next.wixpress.com', 'wix.com', 'godaddy.com',
+                         'hostgator.com.br', 'locaweb.com.br', 'wordpress.com', 'cloudflare.com'}
+
+# Provedores de email pessoal: podem ser o contato real, mas valem menos que o institucional
+PROVEDORES_PESSOAIS = {'gmail.com', 'hotmail.com', 'outlook.com', 'yahoo.com', 'yahoo.com.br',
+                       'live.com', 'bol.com.br', 'uol.com.br', 'terra.com.br', 'icloud.com'}
+
+# Pontuação
+PONTOS_DOMINIO_INSTITUCIONAL = 50
+PONTOS_POR_PAGINA_EXTRA = 5
+MAXIMO_PONTOS_PAGINAS = 15
+PONTOS_COM_MX = 5
+PENALIDADE_FORNECEDOR = -40
+PENALIDADE_PROVEDOR_PESSOAL = -10
+# Domínio desconhecido fora do site (agência que fez o site, parceiro): só vira
+# contato com uma palavra de função forte no endereço (contato@, secretaria@...)
+PENALIDADE_DOMINIO_EXTERNO = -30
+
+# Abaixo disso o endereço fica só nos candidatos (fornecedores, no-reply), nunca como contato
+PONTUACAO_MINIMA = -20
+
+# Palavras na parte local do endereço (cada uma presente soma o seu peso)
+PESOS_FUNCAO = {
+    'gabinete': 15, 'reitoria': 15, 'direcao': 12, 'diretoria': 12, 'contato': 12, 'contact': 12,
+    'secretaria': 10, 'atendimento': 10, 'faleconosco': 10, 'ouvidoria': 8, 'comunicacao': 8,
+    'inovacao': 8, 'pesquisa': 6, 'info': 4, 'geral': 4,
+    'webmaster': -15, 'postmaster': -20, 'suporte': -8, 'noreply': -50, 'no-reply': -50,
+    'naoresponda': -50, 'nao-responda': -50, 'mailer-daemon': -50, 'privacy': -10, 'lgpd': -10, 'dpo': -10,
+}
+
+# Validade do cache de MX (em segundos)
+TTL_MX = 30 * 24 * 3600
+
+class Candidato:
+    """Email encontrado num site, com a pontuação e os motivos dela"""
+
+    def __init__(self, email, pontuacao=0, motivos=None, valido=True):
+        self.email = email
+        self.pontuacao = pontuacao
+        self.motivos = motivos or []
+        self.valido = valido
+
+    def como_dict(self):
+        return {'email': self.email, 'pontuacao': self.pontuacao, 'motivos': self.motivos, 'valido': self.valido}
+
+def motivo_invalido(email):
+    """Por que o endereço não é um email utilizável, ou None se a sintaxe é válida"""
+    if len(email) > TAMANHO_MAXIMO_EMAIL or not PADRAO_EMAIL_ESTRITO.match(email):
+        return 'sintaxe'
+
+    local, dominio = email.rsplit('@', 1)
+    if len(local) > TAMANHO_MAXIMO_LOCAL:
+        return 'sintaxe'
+    if dominio.rsplit('.', 1)[-1] in EXTENSOES_ARQUIVO:
+        return 'nome_de_arquivo'
+    if dominio in DOMINIOS_FICTICIOS:
+        return 'dominio_ficticio'
+
+    return None
+
+class CacheMX:
+    """Cache persistente (SQLite) do resultado da consulta de MX por domínio"""
+
+    def __init__(self, caminho=CAMINHO_CACHE_MX, ttl=TTL_MX):
+        self.ttl = ttl
+
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        # Conexão única; o VerificadorMX serializa o acesso entre as threads do crawler
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS mx (
+                dominio TEXT PRIMARY KEY,
+                tem_mx INTEGER,
+                atualizado_em REAL
+            )
+        """)
+        self.conexao.commit()
+
+    def obter(self, dominio):
+        """Retorna (encontrado_no_cache, tem_mx) respeitando o TTL"""
+        linha = self.conexao.execute(
+            "SELECT tem_mx, atualizado_em FROM mx WHERE dominio = ?", (dominio,)
+        ).fetchone()
+
+        if linha is None or time.time() - linha[1] > self.ttl:
+            return False, None
+
+        return True, bool(linha[0])
+
+    def salvar(self, dominio, tem_mx):
+        self.conexao.execute("INSERT OR REPLACE INTO mx VALUES (?, ?, ?)", (dominio, int(tem_mx), time.time()))
+        self.conexao.commit()
+
+    def fechar(self):
+        self.conexao.close()
+
+def resolver_mx_dns(dominio, timeout=5.0):
+    """Consulta de MX via dnspython: True/False, ou None se a resposta não foi conclusiva"""
+    try:
+        dns.resolver.resolve(dominio, 'MX', lifetime=timeout)
+        return True
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        return False
+    except dns.exception.DNSException:
+        return None
+
+class VerificadorMX:
+    """Indica se o domínio de um email recebe mensagens (tem registro MX)
+
+    resolver(dominio) retorna True/False, ou None quando não foi possível
+    saber (erros temporários não são cacheados). Por padrão usa o dnspython;
+    testes e execuções offline podem passar um resolver próprio (ex: o .get de um dict).
+    """
+
+    def __init__(self, resolver=None, cache=None):
+        if resolver is None:
+            if dns is None:
+                raise RuntimeError("verificação de MX requer o pacote dnspython (pip install dnspython)")
+            resolver = resolver_mx_dns
+
+        self.resolver = resolver
+        self.cache = cache if cache is not None else CacheMX()
+        self.memoria = {}
+        self.lock = threading.Lock()
+
+    def tem_mx(self, dominio):
+        # Sob o lock: chamado pelas threads do crawler, e cada domínio é consultado uma vez só
+        with self.lock:
+            if dominio in self.memoria:
+                return self.memoria[dominio]
+
+            encontrado, tem_mx = self.cache.obter(dominio)
+            contar('cache_mx.acertos' if encontrado else 'cache_mx.falhas')
+            if not encontrado:
+                tem_mx = self.resolver(dominio)
+                if tem_mx is not None:
+                    self.cache.salvar(dominio, tem_mx)
+
+            self.memoria[dominio] = tem_mx
+            return tem_mx
+
+def pontuar_email(email, url_site, paginas=1, verificador_mx=None):
+    """Avalia um email encontrado no site; retorna um Candidato"""
+    motivo = motivo_invalido(email)
+    if motivo is not None:
+        return Candidato(email, motivos=[motivo], valido=False)
+
+    local, dominio = email.rsplit('@', 1)
+    pontuacao = 0
+    motivos = []
+
+    if email_institucional(email, url_site):
+        pontuacao += PONTOS_DOMINIO_INSTITUCIONAL
+        motivos.append('dominio_do_site')
+    elif dominio in DOMINIOS_FORNECEDORES:
+        pontuacao += PENALIDADE_FORNECEDOR
+        motivos.append('fornecedor')
+    elif dominio in PROVEDORES_PESSOAIS:
+        pontuacao += PENALIDADE_PROVEDOR_PESSOAL
+        motivos.append('provedor_pessoal')
+    else:
+        pontuacao += PENALIDADE_DOMINIO_EXTERNO
+        motivos.append('dominio_externo')
+
+    for palavra, peso in PESOS_FUNCAO.items():
+        if palavra in local:
+            pontuacao += peso
+            motivos.append(palavra)
+
+    # Endereço externo repetido em várias páginas é rodapé de terceiro ("desenvolvido por"), não contato
+    if paginas > 1 and 'dominio_externo' not in motivos:
+        pontuacao += min(MAXIMO_PONTOS_PAGINAS, (paginas - 1) * PONTOS_POR_PAGINA_EXTRA)
+        motivos.append(f'{paginas}_paginas')
+
+    if verificador_mx is not None:
+        tem_mx = verificador_mx.tem_mx(dominio)
+        if tem_mx is False:
+            return Candidato(email, pontuacao, motivos + ['sem_mx'], valido=False)
+        if tem_mx:
+            pontuacao += PONTOS_COM_MX
+            motivos.append('mx')
+
+    return Candidato(email, pontuacao, motivos)
+
+def classificar_emails(paginas_por_email, url_site, verificador_mx=None):
+    """Candidatos de um site do melhor para o pior (inválidos por último)
+
+    paginas_por_email: {email: número de páginas em que apareceu} (ou uma
+    lista de emails, contando uma página para cada).
+    """
+    if not isinstance(paginas_por_email, dict):
+        paginas_por_email = dict.fromkeys(paginas_por_email, 1)
+
+    candidatos = [pontuar_email(email, url_site, paginas, verificador_mx)
+                  for email, paginas in paginas_por_email.items()]
+
+    # Desempate por ordem alfabética: o resultado não depende da ordem das páginas
+    return sorted(candidatos, key=lambda c: (not c.valido, -c.pontuacao, c.email))
+
+def emails_aceitos(candidatos):
+    """Emails válidos e acima da pontuação mínima, na ordem da classificação"""
+    return [c.email for c in candidatos if c.valido and c.pontuacao >= PONTUACAO_MINIMA]
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from exportacao import CASAS_COORDENADAS
+from incremental import COLUNA_CHAVE, chaves_instituicoes
+
+# Instituições da mesma cidade recebem a mesma coordenada (o centro do município
+# no gazetteer ou o ponto do Nominatim). Para os marcadores não ficarem empilhados,
+# cada grupo com a mesma coordenada é espalhado numa espiral de Fibonacci em torno
+# do ponto. Instituições sem coordenadas ficam de fora do mapa e do espalhamento.
+
+# Distância mínima entre marcadores de um mesmo grupo, em metros
+ESPACAMENTO_METROS = 150
+
+# Metros por grau de latitude (e de longitude no equador)
+METROS_POR_GRAU = 111_320
+
+# Ângulo entre posições consecutivas da espiral (ângulo áureo, ~137,5°)
+ANGULO_AUREO = np.pi * (3 - np.sqrt(5))
+
+# Posições da espiral disponíveis para um grupo: pelo menos estas, e sempre ao
+# menos o dobro do tamanho do grupo (potência de 2), para as colisões serem raras
+POSICOES_MINIMAS = 16
+
+def posicoes_na_espiral(grupos, chaves):
+    """Posição na espiral de cada instituição, para todos os grupos de uma vez
+
+    grupos: número do grupo (mesma coordenada) de cada linha; chaves: chave de
+    cada linha. A posição preferida vem do hash da chave; numa colisão, a
+    seguinte livre (sondagem linear, em ordem de posição preferida e hash).
+    Assim, incluir ou remover uma instituição só move as que colidiam com ela
+    (ou todas, quando o grupo cruza uma potência de 2 e o número de posições
+    muda). Um grupo de uma instituição só fica na posição 0, o próprio ponto.
+    """
+    grupos = np.asarray(grupos, dtype=np.int64)
+    tamanhos = np.bincount(grupos)[grupos]
+    total = np.maximum(POSICOES_MINIMAS, 2 ** np.ceil(np.log2(2 * tamanhos)).astype(np.int64))
+
+    # Hash estável de cada chave (o mesmo em qualquer execução e máquina)
+    valores = pd.util.hash_pandas_object(pd.Series(chaves, dtype=object).astype(str), index=False).to_numpy()
+    preferidas = (valores % total.astype(np.uint64)).astype(np.int64)
+
+    # Ordem de ocupação: por grupo, posição preferida e hash
+    ordem = np.lexsort((valores, preferidas, grupos))
+    grupos_ordem, preferidas_ordem = grupos[ordem], preferidas[ordem]
+
+    # Índice de cada linha dentro do seu grupo (0, 1, 2...)
+    inicio_grupo = np.r_[0, np.flatnonzero(np.diff(grupos_ordem)) + 1]
+    indice = np.arange(len(ordem)) - np.repeat(inicio_grupo, np.diff(np.r_[inicio_grupo, len(ordem)]))
+
+    # Sondagem linear: posição = max(preferida, posição anterior + 1), ou seja,
+    # máximo acumulado de (preferida - índice) + índice. O deslocamento por grupo
+    # impede que o máximo acumulado passe de um grupo para o seguinte.
+    deslocamento = grupos_ordem * (int(total.max()) + int(tamanhos.max()) + 1)
+    posicoes_ordem = np.maximum.accumulate(preferidas_ordem - indice + deslocamento) - deslocamento + indice
+
+    posicoes = np.empty_like(posicoes_ordem)
+    posicoes[ordem] = posicoes_ordem
+    return np.where(tamanhos == 1, 0, posicoes)
+
+def espalhar_coordenadas(df, espacamento=ESPACAMENTO_METROS):
+    """Separa as instituições que têm exatamente a mesma coordenada
+
+    A instituição na posição n do grupo (posicoes_na_espiral, pelo hash de
+    chave_instituicao, calculada para todos os grupos de uma vez) vai para raio = espacamento * sqrt(n) e
+    ângulo = n * ângulo áureo; a posição 0 é o ponto original. O resultado
+    depende só das coordenadas e das chaves, então é o mesmo a cada execução.
+    A coordenada original fica em latitude_centro/longitude_centro.
+    """
+    df = df.copy()
+    chaves = df[COLUNA_CHAVE] if COLUNA_CHAVE in df.columns else chaves_instituicoes(df)
+    validas = df['latitude'].notna() & df['longitude'].notna()
+
+    df['latitude_centro'] = df['latitude']
+    df['longitude_centro'] = df['longitude']
+
+    # Posição de cada instituição dentro do seu grupo de coordenadas iguais
+    pontos = pd.DataFrame({'lat': df['latitude'], 'lon': df['longitude'], 'chave': chaves})[validas]
+    grupos = pontos.groupby(['lat', 'lon']).ngroup()
+
+    n = posicoes_na_espiral(grupos, pontos['chave']).astype(float)
+    lat = pontos['lat'].to_numpy(dtype=float)
+    lon = pontos['lon'].to_numpy(dtype=float)
+    raio = espacamento * np.sqrt(n) / METROS_POR_GRAU
+    angulo = n * ANGULO_AUREO
+
+    df.loc[validas, 'latitude'] = np.round(lat + raio * np.sin(angulo), CASAS_COORDENADAS)
+    df.loc[validas, 'longitude'] = np.round(lon + raio * np.cos(angulo) / np.cos(np.radians(lat)), CASAS_COORDENADAS)
+
+    return df
@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from caminhos import CAMINHO_PAINEL, CAMINHO_PAINEL_COMPACTO, preparar_saida
+from fluxo_json import gravar_registros, ler_registros
+from metricas import execucao
+
+# Linhas da planilha em que a coluna de nome traz o tipo e a abreviatura traz o nome
+NOMES_QUE_SAO_TIPO = ('Instituto Embrapii', 'Parque Tecnológico')
+
+# Setor exibido no painel quando a planilha não informa
+SETOR_NAO_INFORMADO = 'Não informado'
+
+# Colunas de cada registro do painel, na ordem do data.json
+COLUNAS_PAINEL = ('Cidade', 'Estado', 'Abreviatura da Instituição', 'Nome da Instituição/Tipo', 'Setor',
+                  'Site', 'Contato', 'latitude', 'longitude', 'Tipo')
+
+# Colunas com poucos valores distintos: no painel compacto cada linha guarda só o
+# índice do valor numa tabela ordenada
+COLUNAS_CODIFICADAS = ('Cidade', 'Estado', 'Setor', 'Tipo')
+
+# Colunas com a lista de valores e contagens pré-calculada (filtros do script.js)
+COLUNAS_FACETAS = ('Tipo', 'Setor', 'Estado')
+
+# Colunas indexadas para a busca do painel (termos sem acento, em minúsculas)
+COLUNAS_BUSCA = ('Nome da Instituição/Tipo', 'Abreviatura da Instituição', 'Cidade', 'Tipo', 'Estado', 'Setor')
+
+# Separadores de termos; o script.js divide o texto buscado com a mesma expressão
+SEPARADORES_BUSCA = re.compile(r'[^a-z0-9]+')
+
+# Formato do data.min.json; o script.js volta ao data.json se não reconhecer a versão
+VERSAO_PAINEL_COMPACTO = 1
+
+# Casas decimais das coordenadas no painel compacto (~10 cm)
+CASAS_COORDENADAS = 6
+
+def classificar_tipo(nome):
+    """Tipo exibido no painel (usado nas cores dos marcadores e nos filtros)"""
+    if nome.startswith('Instituto Federal'):
+        return 'IFS'
+    if 'universidad' in nome.lower():
+        return 'Universidades'
+    return 'ICT'
+
+def registro_painel(instituicao, emails_encontrados=()):
+    """Converte uma instituição geocodificada no registro usado pelo script.js"""
+    nome = instituicao['Nome da Instituição/Tipo']
+    abreviatura = instituicao['Abreviatura da Instituição']
+
+    if nome in NOMES_QUE_SAO_TIPO and abreviatura:
+        tipo, nome, abreviatura = nome, abreviatura, ''
+    else:
+        tipo = classificar_tipo(nome)
+
+    setor = instituicao['Setor']
+    if setor == 'Outros':
+        setor = SETOR_NAO_INFORMADO
+
+    # Email da planilha; sem ele, o primeiro encontrado no site
+    contato = instituicao['E-mail de contato'] or next(iter(emails_encontrados), '')
+
+    return {
+        'Cidade': instituicao['Cidade'],
+        'Estado': instituicao['Estado'],
+        'Abreviatura da Instituição': abreviatura,
+        'Nome da Instituição/Tipo': nome,
+        'Setor': setor,
+        'Site': instituicao['Site'],
+        'Contato': contato,
+        'latitude': instituicao['latitude'],
+        'longitude': instituicao['longitude'],
+        'Tipo': tipo,
+    }
+
+def montar_painel(instituicoes, emails_por_site=None):
+    """Gera os registros do painel para as instituições com coordenadas"""
+    emails_por_site = emails_por_site or {}
+
+    for inst in instituicoes:
+        if inst['latitude'] is not None and inst['longitude'] is not None:
+            yield registro_painel(inst, emails_por_site.get(inst['Site'], ()))
+
+def salvar_painel(registros, caminho):
+    """Grava o data.json do painel (registros de qualquer iterável); retorna quantos"""
+    return gravar_registros(registros, caminho)
+
+def termos_busca(texto):
+    """Termos de um texto para o índice de busca (sem acentos, em minúsculas)
+
+    Deve dar o mesmo resultado que foldSearchText + split no script.js.
+    """
+    decomposto = unicodedata.normalize('NFD', texto or '')
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return [termo for termo in SEPARADORES_BUSCA.split(sem_acentos.lower()) if termo]
+
+def indice_busca(colunas, tabelas):
+    """Índice invertido: vocabulário ordenado e, para cada termo, as linhas onde aparece
+
+    Prefixos não são gravados (triplicariam o arquivo): como o vocabulário é
+    ordenado, o script.js acha todos os termos com um prefixo por busca binária.
+    """
+    linhas_por_termo = defaultdict(set)
+
+    for coluna in COLUNAS_BUSCA:
+        if coluna in tabelas:
+            # Colunas codificadas: cada valor distinto é dividido em termos uma vez só
+            termos_por_codigo = [termos_busca(valor) for valor in tabelas[coluna]]
+            for linha, codigo in enumerate(colunas[coluna]):
+                for termo in termos_por_codigo[codigo]:
+                    linhas_por_termo[termo].add(linha)
+        else:
+            for linha, valor in enumerate(colunas[coluna]):
+                for termo in termos_busca(valor):
+                    linhas_por_termo[termo].add(linha)
+
+    termos = sorted(linhas_por_termo)
+    return {'termos': termos, 'linhas': [sorted(linhas_por_termo[termo]) for termo in termos]}
+
+class PainelCompacto:
+    """Acumula os registros do painel em colunas para o data.min.json
+
+    As colunas de COLUNAS_CODIFICADAS viram índices em tabelas de valores
+    ordenadas; as facetas (valores e contagens) e o índice de busca já saem
+    calculados.
+    """
+
+    def __init__(self):
+        self.colunas = {coluna: [] for coluna in COLUNAS_PAINEL}
+        self.codigos = {coluna: {} for coluna in COLUNAS_CODIFICADAS}
+
+    def adicionar(self, registro):
+        for coluna, valores in self.colunas.items():
+            valor = registro.get(coluna, '')
+            if coluna in self.codigos:
+                valor = self.codigos[coluna].setdefault(valor, len(self.codigos[coluna]))
+            elif coluna in ('latitude', 'longitude') and valor is not None:
+                valor = round(valor, CASAS_COORDENADAS)
+            valores.append(valor)
+
+    def registrar(self, registros):
+        """Repassa os registros, acumulando cada um (para gravar o data.json e o compacto numa passada)"""
+        for registro in registros:
+            self.adicionar(registro)
+            yield registro
+
+    def payload(self):
+        """Dicionário gravado no data.min.json"""
+        tabelas = {}
+        colunas = dict(self.colunas)
+
+        for coluna, codigos in self.codigos.items():
+            # Tabela em ordem alfabética: as facetas saem na ordem dos filtros
+            tabela = sorted(codigos)
+            nova_posicao = {codigos[valor]: posicao for posicao, valor in enumerate(tabela)}
+            tabelas[coluna] = tabela
+            colunas[coluna] = [nova_posicao[codigo] for codigo in self.colunas[coluna]]
+
+        facetas = {}
+        for coluna in COLUNAS_FACETAS:
+            contagens = Counter(colunas[coluna])
+            facetas[coluna] = [[valor, contagens[posicao]] for posicao, valor in enumerate(tabelas[coluna]) if valor]
+
+        return {
+            'versao': VERSAO_PAINEL_COMPACTO,
+            'total': len(self.colunas['Cidade']),
+            'tabelas': tabelas,
+            'colunas': colunas,
+            'facetas': facetas,
+            'busca': indice_busca(colunas, tabelas),
+        }
+
+def salvar_painel_compacto(compacto, caminho):
+    """Grava o data.min.json (sem espaços, gravação atômica)"""
+    temporario = preparar_saida(caminho) + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(compacto.payload(), f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temporario, caminho)
+
+def main():
+    # Gera o data.min.json a partir de um data.json já existente (sem rodar o pipeline)
+    parser = argparse.ArgumentParser(description="Gera o painel compacto (data.min.json) a partir do data.json")
+    parser.add_argument('origem', nargs='?', default=CAMINHO_PAINEL, help="registros do painel (padrão: data.json)")
+    parser.add_argument('destino', nargs='?', default=CAMINHO_PAINEL_COMPACTO,
+                        help="arquivo compacto gerado (padrão: data.min.json)")
+    args = parser.parse_args()
+
+    compacto = PainelCompacto()
+    for registro in ler_registros(args.origem):
+        compacto.adicionar(registro)
+    salvar_painel_compacto(compacto, args.destino)
+
+    print(f"{compacto.payload()['total']} instituições: "
+          f"{os.path.getsize(args.origem)} -> {os.path.getsize(args.destino)} bytes")
+
+if __name__ == "__main__":
+    with execucao('exportacao'):
+        main()
@@ -0,0 +1,105 @@
+import html
+import re
+from urllib.parse import unquote, urljoin
+
+# Extração de emails e links de contato direto nos bytes do HTML, sem montar a árvore DOM.
+# Quando a página tem "@" mas nada casa nos bytes (endereço partido por tags, como
+# contato@<span>inst</span>.edu.br), os emails saem do texto sem as tags, como no get_text()
+
+# Mesmo padrão de email usado historicamente em buscar_emails.py, em bytes
+PADRAO_EMAIL = re.compile(rb'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+# Extensões que indicam nomes de arquivo e não emails (ex: logo@2x.png)
+EXTENSOES_IGNORADAS = ('.jpg', '.png', '.gif', '.pdf', '.doc')
+
+# Palavras que indicam páginas de contato (no href ou no texto do link)
+PALAVRAS_CONTATO = ('contato', 'contact', 'fale', 'sobre', 'about', 'equipe', 'team')
+
+# Ofuscações comuns: "fulano [at] inst.br", "fulano (arroba) inst (ponto) br", entidades HTML
+_OFUSCACOES = re.compile(
+    rb'(?P<arroba>\s*[\[\(\{]\s*(?:at|arroba)\s*[\]\)\}]\s*|&#0*64;|&#x0*40;|&commat;)'
+    rb'|(?P<ponto>\s*[\[\(\{]\s*(?:dot|ponto)\s*[\]\)\}]\s*|&#0*46;|&#x0*2e;|&period;)',
+    re.IGNORECASE
+)
+_GATILHOS_OFUSCACAO = (b'[', b'(', b'{', b'&#', b'&commat;', b'&period;')
+
+# Links: <a ... href="..."> texto </a>
+_LINK = re.compile(
+    rb'<a\b[^>]*?\bhref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))[^>]*>(.*?)</a\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+_TAG = re.compile(rb'<[^>]*>')
+_MAILTO = re.compile(rb'mailto:([^"\'\s>?]+)', re.IGNORECASE)
+
+def _substituir_ofuscacao(match):
+    return b'@' if match.group('arroba') else b'.'
+
+def _email_valido(email):
+    return not any(ext in email for ext in EXTENSOES_IGNORADAS)
+
+def _emails_do_texto(conteudo):
+    # Texto da página como o get_text() do BeautifulSoup: tags removidas sem separador
+    texto = html.unescape(_TAG.sub(b'', conteudo).decode('utf-8', 'replace')).encode('utf-8', 'ignore')
+    for bruto in PADRAO_EMAIL.findall(texto):
+        email = bruto.decode('ascii', 'ignore').lower()
+        if _email_valido(email):
+            yield email
+
+def extrair_emails(conteudo):
+    """Extrai emails (minúsculos, sem duplicatas) dos bytes de uma página HTML"""
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode('utf-8', 'replace')
+
+    if any(gatilho in conteudo for gatilho in _GATILHOS_OFUSCACAO):
+        conteudo = _OFUSCACOES.sub(_substituir_ofuscacao, conteudo)
+
+    emails = set()
+
+    for bruto in PADRAO_EMAIL.findall(conteudo):
+        email = bruto.decode('ascii', 'ignore').lower()
+        if _email_valido(email):
+            emails.add(email)
+
+    # Links mailto: podem trazer o endereço codificado (%40)
+    if b'mailto:' in conteudo.lower():
+        for bruto in _MAILTO.findall(conteudo):
+            texto = unquote(bruto.decode('utf-8', 'ignore')).encode('utf-8', 'ignore')
+            for encontrado in PADRAO_EMAIL.findall(texto):
+                email = encontrado.decode('ascii', 'ignore').lower()
+                if _email_valido(email):
+                    emails.add(email)
+
+    if not emails and b'@' in conteudo:
+        emails.update(_emails_do_texto(conteudo))
+
+    return list(emails)
+
+def extrair_ancoras(conteudo, url_base, palavras=PALAVRAS_CONTATO):
+    """Lista, em ordem do documento, os pares (url, texto_minusculo) dos links cujo
+    href ou texto contém alguma das palavras"""
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode('utf-8', 'replace')
+
+    ancoras = []
+
+    for match in _LINK.finditer(conteudo):
+        href = (match.group(1) or match.group(2) or match.group(3) or b'').decode('utf-8', 'replace').strip()
+        if not href:
+            continue
+
+        texto = _TAG.sub(b' ', match.group(4)).decode('utf-8', 'replace').lower()
+        href_minusculo = href.lower()
+
+        # Resolver a URL só para os links que interessam (urljoin é o passo mais caro)
+        if any(palavra in href_minusculo or palavra in texto for palavra in palavras):
+            ancoras.append((urljoin(url_base, href), texto))
+
+    return ancoras
+
+def extrair_links(conteudo, url_base, palavras=PALAVRAS_CONTATO):
+    """Lista, em ordem do documento, os links cujo href ou texto contém alguma das palavras"""
+    return [url for url, _ in extrair_ancoras(conteudo, url_base, palavras)]
+
+def extrair_emails_e_links(conteudo, url_base, palavras=PALAVRAS_CONTATO):
+    """Retorna (emails, links_de_contato) de uma página HTML"""
+    return extrair_emails(conteudo), extrair_links(conteudo, url_base, palavras)
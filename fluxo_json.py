@@ -0,0 +1,146 @@
+import json
+import os
+import re
+
+from caminhos import preparar_saida
+
+# Leitura e gravação de registros um a um (memória constante), em dois formatos:
+# NDJSON (.ndjson/.jsonl, um registro por linha) e array JSON (.json, o formato
+# que o painel e os scripts já usam, com a mesma indentação do json.dump).
+
+EXTENSOES_NDJSON = ('.ndjson', '.jsonl')
+
+# Tamanho dos blocos lidos do disco pelo leitor de arrays
+TAMANHO_BLOCO = 64 * 1024
+
+_decodificador = json.JSONDecoder()
+_ESPACOS = re.compile(r'\s*')
+
+def _arquivo_temporario(caminho):
+    return preparar_saida(caminho) + '.tmp'
+
+def gravar_ndjson(registros, caminho):
+    """Grava os registros (qualquer iterável) um por linha; retorna quantos foram gravados"""
+    temporario = _arquivo_temporario(caminho)
+    total = 0
+
+    with open(temporario, 'w', encoding='utf-8') as f:
+        for registro in registros:
+            f.write(json.dumps(registro, ensure_ascii=False))
+            f.write('\n')
+            total += 1
+
+    os.replace(temporario, caminho)
+    return total
+
+def ler_ndjson(caminho):
+    """Gera os registros de um arquivo NDJSON, um por vez (linhas vazias são ignoradas)"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for linha in f:
+            linha = linha.strip()
+            if linha:
+                yield json.loads(linha)
+
+def gravar_json_array(registros, caminho, indent=2):
+    """Grava os registros como um array JSON sem montar a lista em memória
+
+    Com indent=2 a saída é idêntica à de json.dump(lista, f, ensure_ascii=False, indent=2).
+    Retorna quantos registros foram gravados.
+    """
+    temporario = _arquivo_temporario(caminho)
+    prefixo = ' ' * indent if indent else ''
+    separador = ',\n' if indent else ', '
+    total = 0
+
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for registro in registros:
+            texto = json.dumps(registro, ensure_ascii=False, indent=indent)
+            if indent:
+                texto = prefixo + texto.replace('\n', '\n' + prefixo)
+            f.write((separador if total else ('\n' if indent else '')) + texto)
+            total += 1
+        f.write(('\n]' if total and indent else ']'))
+
+    os.replace(temporario, caminho)
+    return total
+
+def _exigir_fim(f, resto, caminho, tamanho_bloco):
+    # Depois do ']' final só pode haver espaços, até o fim do arquivo
+    while True:
+        if resto.strip():
+            raise ValueError(f"{caminho}: conteúdo após o fim do array JSON")
+        resto = f.read(tamanho_bloco)
+        if not resto:
+            return
+
+def ler_json_array(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera os elementos de um arquivo com um array JSON, lendo o arquivo em blocos
+
+    Arquivos que json.load recusaria (vírgula antes do ']', conteúdo depois
+    dele, array incompleto) levantam ValueError.
+    """
+    with open(caminho, 'r', encoding='utf-8') as f:
+        buffer = f.read(tamanho_bloco)
+        while not buffer.strip():
+            bloco = f.read(tamanho_bloco)
+            if not bloco:
+                break
+            buffer += bloco
+
+        pos = _ESPACOS.match(buffer).end()
+        if buffer[pos:pos + 1] != '[':
+            raise ValueError(f"{caminho} não contém um array JSON")
+        pos += 1
+        fim_arquivo = False
+        primeiro = True
+
+        while True:
+            # Separador entre elementos (a vírgula só é exigida a partir do segundo)
+            inicio = _ESPACOS.match(buffer, pos).end()
+            virgula = not primeiro and buffer[inicio:inicio + 1] == ','
+            if virgula:
+                inicio = _ESPACOS.match(buffer, inicio + 1).end()
+
+            completo = False
+            if inicio < len(buffer):
+                if buffer[inicio] == ']':
+                    if virgula:
+                        raise ValueError(f"{caminho}: vírgula antes do fim do array JSON")
+                    _exigir_fim(f, buffer[inicio + 1:], caminho, tamanho_bloco)
+                    return
+                try:
+                    elemento, fim = _decodificador.raw_decode(buffer, inicio)
+                    # O elemento só termina em ',' ou ']'; sem isso ele pode estar cortado
+                    # (ex: o número 3.25 lido como "3." no fim do bloco)
+                    seguinte = _ESPACOS.match(buffer, fim).end()
+                    completo = buffer[seguinte:seguinte + 1] in (',', ']')
+                except json.JSONDecodeError:
+                    pass
+
+            if completo:
+                yield elemento
+                pos = fim
+                primeiro = False
+                continue
+
+            if fim_arquivo:
+                raise ValueError(f"{caminho}: array JSON inválido ou incompleto")
+
+            # Descartar o que já foi consumido e ler o próximo bloco
+            bloco = f.read(tamanho_bloco)
+            fim_arquivo = not bloco
+            buffer = buffer[pos:] + bloco
+            pos = 0
+
+def ler_registros(caminho):
+    """Gera os registros de um arquivo NDJSON ou array JSON, conforme a extensão"""
+    if caminho.endswith(EXTENSOES_NDJSON):
+        return ler_ndjson(caminho)
+    return ler_json_array(caminho)
+
+def gravar_registros(registros, caminho):
+    """Grava os registros em NDJSON ou array JSON, conforme a extensão"""
+    if caminho.endswith(EXTENSOES_NDJSON):
+        return gravar_ndjson(registros, caminho)
+    return gravar_json_array(registros, caminho)
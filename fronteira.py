@@ -0,0 +1,159 @@
+import heapq
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from rastreamento import host_da_url
+
+# Páginas baixadas por site (página principal inclusa)
+ORCAMENTO_PAGINAS = 4
+
+# Saltos a partir da página principal (1 = links da home, 2 = links das páginas de contato)
+PROFUNDIDADE_MAXIMA = 2
+
+# Peso de cada palavra no href ou no texto do link; links sem nenhuma não entram na fila
+PESOS_PALAVRAS = {
+    'contato': 10,
+    'contact': 10,
+    'fale': 8,
+    'e-mail': 6,
+    'email': 6,
+    'ouvidoria': 5,
+    'expediente': 5,
+    'equipe': 4,
+    'team': 4,
+    'sobre': 3,
+    'about': 3,
+}
+PALAVRAS_FRONTEIRA = tuple(PESOS_PALAVRAS)
+
+# Ajustes de prioridade por segmento de caminho e por host
+PENALIDADE_SEGMENTO = 1
+BONUS_MESMO_HOST = 3
+
+# Sufixos sob os quais organizações diferentes registram domínios (ex: ufrgs.br, irga.rs.gov.br)
+UFS = ('ac', 'al', 'am', 'ap', 'ba', 'ce', 'df', 'es', 'go', 'ma', 'mg', 'ms', 'mt', 'pa', 'pb', 'pe',
+       'pi', 'pr', 'rj', 'rn', 'ro', 'rr', 'rs', 'sc', 'se', 'sp', 'to')
+SUFIXOS_PUBLICOS = frozenset(
+    ['br', 'com.br', 'edu.br', 'gov.br', 'org.br', 'net.br', 'ind.br', 'art.br', 'leg.br', 'jus.br', 'mil.br',
+     'tec.br', 'eco.br', 'inf.br', 'com', 'org', 'net', 'edu', 'gov']
+    + [f"{uf}.gov.br" for uf in UFS] + [f"{uf}.leg.br" for uf in UFS]
+)
+
+# Links que não levam a páginas HTML
+ESQUEMAS_ACEITOS = ('http', 'https')
+EXTENSOES_IGNORADAS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.zip', '.doc', '.docx', '.xls', '.xlsx', '.mp4')
+
+def normalizar_url(url):
+    """Forma canônica de uma URL para deduplicação
+
+    Esquema e host em minúsculas, sem fragmento, sem porta padrão, sem barra
+    final no caminho e com os parâmetros da query em ordem.
+    """
+    partes = urlparse(url.strip())
+    esquema = partes.scheme.lower()
+    host = (partes.hostname or '').lower()
+
+    if partes.port and (esquema, partes.port) not in (('http', 80), ('https', 443)):
+        host = f"{host}:{partes.port}"
+
+    caminho = partes.path.rstrip('/') or '/'
+    query = urlencode(sorted(parse_qsl(partes.query, keep_blank_values=True)))
+
+    return urlunparse((esquema, host, caminho, '', query, ''))
+
+def dominio_base(host):
+    """Host sem o prefixo www."""
+    return host[4:] if host.startswith('www.') else host
+
+def dominio_registravel(host):
+    """Domínio registrado pela organização (ex: www.jaguarao.ifsul.edu.br -> ifsul.edu.br)
+
+    É o sufixo público mais longo de SUFIXOS_PUBLICOS mais um rótulo; hosts
+    sem sufixo conhecido (ou IPs) são retornados como estão.
+    """
+    host = host.lower().split(':', 1)[0]
+    rotulos = host.split('.')
+
+    for inicio in range(1, len(rotulos)):
+        if '.'.join(rotulos[inicio:]) in SUFIXOS_PUBLICOS:
+            return '.'.join(rotulos[inicio - 1:])
+
+    return host
+
+def mesmo_dominio(host_a, host_b):
+    """Indica se dois hosts pertencem ao mesmo domínio (um é igual ou subdomínio do outro)"""
+    a, b = dominio_base(host_a), dominio_base(host_b)
+    return a == b or a.endswith('.' + b) or b.endswith('.' + a)
+
+def email_institucional(email, url_site):
+    """Indica se o email pertence ao domínio do site (ex: secretaria@inf.ufrgs.br em www.ufrgs.br)"""
+    dominio_email = email.rsplit('@', 1)[-1].lower()
+    return mesmo_dominio(dominio_email, host_da_url(url_site))
+
+def pontuar_link(url, texto, host_site, profundidade):
+    """Prioridade de um link candidato, ou None se ele não deve ser visitado"""
+    partes = urlparse(url)
+    host = (partes.hostname or '').lower()
+
+    if partes.scheme.lower() not in ESQUEMAS_ACEITOS or not mesmo_dominio(host, host_site):
+        return None
+    if partes.path.lower().endswith(EXTENSOES_IGNORADAS):
+        return None
+
+    caminho = partes.path.lower()
+    pontos_palavras = sum(
+        peso for palavra, peso in PESOS_PALAVRAS.items()
+        if palavra in caminho or palavra in texto
+    )
+    if pontos_palavras == 0:
+        return None
+
+    segmentos = len([s for s in caminho.split('/') if s])
+    pontos = pontos_palavras - PENALIDADE_SEGMENTO * (segmentos + profundidade)
+
+    if host == host_site:
+        pontos += BONUS_MESMO_HOST
+
+    return pontos
+
+class FronteiraSite:
+    """Fila de prioridade das páginas a visitar em um site, com orçamento de páginas
+
+    Cada URL (normalizada) entra na fila uma única vez. Em empates vale a
+    ordem de descoberta.
+    """
+
+    def __init__(self, url_inicial, orcamento=ORCAMENTO_PAGINAS, profundidade_maxima=PROFUNDIDADE_MAXIMA):
+        self.host_site = host_da_url(url_inicial)
+        self.orcamento = orcamento
+        self.profundidade_maxima = profundidade_maxima
+        self.vistas = {normalizar_url(url_inicial)}
+        self.fila = [(0, 0, url_inicial, 0)]
+        self.sequencia = 1
+        self.visitadas = 0
+
+    def adicionar_links(self, ancoras, profundidade):
+        """Enfileira os pares (url, texto) encontrados em uma página da profundidade informada"""
+        if profundidade >= self.profundidade_maxima:
+            return
+
+        for url, texto in ancoras:
+            chave = normalizar_url(url)
+            if chave in self.vistas:
+                continue
+
+            pontos = pontuar_link(url, texto, self.host_site, profundidade + 1)
+            if pontos is None:
+                continue
+
+            self.vistas.add(chave)
+            heapq.heappush(self.fila, (-pontos, self.sequencia, url, profundidade + 1))
+            self.sequencia += 1
+
+    def proxima(self):
+        """Retorna (url, profundidade) da próxima página, ou None se a fila ou o orçamento acabou"""
+        if not self.fila or self.visitadas >= self.orcamento:
+            return None
+
+        _, _, url, profundidade = heapq.heappop(self.fila)
+        self.visitadas += 1
+        return url, profundidade
@@ -0,0 +1,481 @@
+import csv
+import difflib
+import heapq
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from caminhos import CAMINHO_CACHE_GEOCODIFICACAO
+from metricas import contar, cronometro
+from rastreamento import rastrear_em_paralelo
+from sessao_http import obter_sessao
+
+# Nominatim (OpenStreetMap) - gratuito e sem necessidade de API key
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+USER_AGENT = 'Painel-Instituicoes-RS/1.0'
+
+# Gazetteer com todos os municípios brasileiros (gerado por gerar_municipios_ibge.py)
+CAMINHO_MUNICIPIOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'municipios_ibge.csv')
+
+# Cache persistente compartilhado por todos os scripts do pipeline
+CAMINHO_CACHE = CAMINHO_CACHE_GEOCODIFICACAO
+
+# Validade das entradas do cache (em segundos)
+TTL_ENCONTRADA = 365 * 24 * 3600     # Cidades não mudam de lugar
+TTL_NAO_ENCONTRADA = 7 * 24 * 3600   # Resultados negativos expiram antes
+
+# Busca aproximada: palavras que não distinguem municípios e similaridade mínima aceita
+PALAVRAS_IGNORADAS = {'campus', 'de', 'da', 'do', 'das', 'dos', 'sul'}
+CONFIANCA_MINIMA = 0.8
+MAXIMO_CANDIDATOS = 10
+
+# Vazão permitida no Nominatim (política de uso: 1 req/s, sem rajadas)
+CONSULTAS_POR_SEGUNDO = 1.0
+RAJADA_MAXIMA = 1
+
+# Consultas simultâneas no modo em lote (só ajuda com um servidor que aceite mais de 1 req/s)
+CONSULTAS_SIMULTANEAS = 4
+
+# Nome por extenso (normalizado) de cada estado -> sigla
+ESTADOS = {
+    'acre': 'AC', 'alagoas': 'AL', 'amapa': 'AP', 'amazonas': 'AM', 'bahia': 'BA',
+    'ceara': 'CE', 'distrito federal': 'DF', 'espirito santo': 'ES', 'goias': 'GO',
+    'maranhao': 'MA', 'mato grosso': 'MT', 'mato grosso do sul': 'MS', 'minas gerais': 'MG',
+    'para': 'PA', 'paraiba': 'PB', 'parana': 'PR', 'pernambuco': 'PE', 'piaui': 'PI',
+    'rio de janeiro': 'RJ', 'rio grande do norte': 'RN', 'rio grande do sul': 'RS',
+    'rondonia': 'RO', 'roraima': 'RR', 'santa catarina': 'SC', 'sao paulo': 'SP',
+    'sergipe': 'SE', 'tocantins': 'TO',
+}
+
+_limitador_padrao = None
+_cache_padrao = None
+_municipios = None
+_indice_trigramas = None
+
+def remover_acentos(texto):
+    """Remove acentos e diacríticos de um texto"""
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+def normalizar_cidade(cidade):
+    """Normaliza o nome da cidade para uso como chave de busca"""
+    cidade = str(cidade).strip()
+
+    # Remover sufixo de estado (ex: "Pelotas/RS")
+    if '/' in cidade:
+        cidade = cidade.split('/')[0]
+
+    cidade = remover_acentos(cidade).casefold()
+
+    # "Sant'Ana" = "Santana", "Ji-Paraná" = "Ji Paraná"
+    for apostrofo in ("'", '’', '`'):
+        cidade = cidade.replace(apostrofo, '')
+    cidade = cidade.replace('-', ' ')
+
+    return ' '.join(cidade.split())
+
+def chave_cidade(cidade, estado="RS"):
+    """Monta a chave normalizada cidade+estado usada no cache"""
+    return f"{str(estado).strip().upper()}|{normalizar_cidade(cidade)}"
+
+def carregar_municipios(caminho=CAMINHO_MUNICIPIOS):
+    """Carrega o gazetteer em um índice {chave cidade+estado: município}"""
+    municipios = {}
+
+    with open(caminho, 'r', encoding='utf-8', newline='') as f:
+        for linha in csv.DictReader(f):
+            municipios[chave_cidade(linha['nome'], linha['uf'])] = {
+                'codigo_ibge': linha['codigo_ibge'],
+                'nome': linha['nome'],
+                'uf': linha['uf'],
+                'lat': float(linha['latitude']),
+                'lng': float(linha['longitude'])
+            }
+
+    return municipios
+
+def obter_municipios():
+    """Retorna o índice do gazetteer, carregando-o na primeira chamada"""
+    global _municipios
+
+    if _municipios is None:
+        _municipios = carregar_municipios()
+
+    return _municipios
+
+def buscar_municipio(cidade, estado="RS"):
+    """Busca exata no gazetteer local; retorna None se não existir"""
+    return obter_municipios().get(chave_cidade(cidade, estado))
+
+def palavras_significativas(nome):
+    """Palavras de um nome normalizado sem as ignoradas ("caxias do sul" -> ('caxias',))"""
+    return tuple(p for p in nome.split() if p not in PALAVRAS_IGNORADAS)
+
+def trigramas(texto):
+    """Trigramas das palavras significativas de um nome normalizado"""
+    palavras = palavras_significativas(texto) or texto.split()
+    texto = f"  {' '.join(palavras)} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+def construir_indice_trigramas(municipios):
+    """Monta o índice invertido {uf: {trigrama: [chaves]}}, o nº de trigramas por chave
+    e quantos municípios (no país todo) têm cada conjunto de palavras significativas
+    """
+    indice = {}
+    tamanhos = {}
+    homonimos = Counter()
+
+    for chave, municipio in municipios.items():
+        nome = chave.split('|', 1)[1]
+        nome_trigramas = trigramas(nome)
+        tamanhos[chave] = len(nome_trigramas)
+        homonimos[palavras_significativas(nome)] += 1
+
+        por_trigrama = indice.setdefault(municipio['uf'], {})
+        for trigrama in nome_trigramas:
+            por_trigrama.setdefault(trigrama, []).append(chave)
+
+    return indice, tamanhos, homonimos
+
+def pontuar_nomes(consulta, candidato, comparador=None, limite=0.0, homonimos=1):
+    """Similaridade entre 0 e 1 de dois nomes normalizados
+
+    Candidatos que não podem superar `limite` são descartados cedo (retorna <= limite).
+    homonimos é quantos municípios têm as mesmas palavras significativas do candidato.
+    """
+
+    # "Jaguarão do Sul" x "Jaguarão", "Campus Alvorada" x "Alvorada": mesmas palavras
+    # significativas valem 0.9. Se o nome do candidato perdeu palavras ("Caxias" x
+    # "Caxias do Sul"), a consulta é um nome parcial e só vale se nenhum outro
+    # município se reduz às mesmas palavras (Caxias/MA, São José/SC)
+    palavras_consulta = palavras_significativas(consulta)
+    palavras_candidato = palavras_significativas(candidato)
+    parcial = palavras_candidato != tuple(candidato.split())
+    iguais = palavras_consulta and palavras_consulta == palavras_candidato
+    minimo = 0.9 if iguais and (not parcial or homonimos == 1) else 0.0
+
+    # O comparador pode ser reaproveitado entre candidatos (análise da consulta fica em cache)
+    if comparador is None:
+        comparador = difflib.SequenceMatcher(None, '', consulta)
+    comparador.set_seq1(candidato)
+
+    # Limites superiores baratos antes do cálculo completo
+    limite = max(limite, minimo)
+    if comparador.real_quick_ratio() <= limite or comparador.quick_ratio() <= limite:
+        return minimo
+
+    return max(minimo, comparador.ratio())
+
+@lru_cache(maxsize=None)
+def buscar_municipio_aproximado(cidade, estado="RS"):
+    """Busca tolerante a acentos e erros de digitação; retorna (município, confiança)"""
+    global _indice_trigramas
+
+    municipios = obter_municipios()
+    chave = chave_cidade(cidade, estado)
+
+    if chave in municipios:
+        return municipios[chave], 1.0
+
+    # Célula com o nome de um estado não é município: sem isso, "Rio Grande do Sul"
+    # (com 'sul' ignorado) casaria com Rio Grande
+    uf, consulta = chave.split('|', 1)
+    if consulta in ESTADOS:
+        return None, 0.0
+
+    if _indice_trigramas is None:
+        _indice_trigramas = construir_indice_trigramas(municipios)
+
+    indice, tamanhos, homonimos = _indice_trigramas
+
+    # Nome parcial de mais de um município ("Caxias": Caxias/MA e Caxias do Sul;
+    # "Sao Jose": São José/SC e São José do Sul) é ambíguo: não adivinhar
+    palavras = palavras_significativas(consulta)
+    if homonimos[palavras] > 1 and f"{uf}|{' '.join(palavras)}" not in municipios:
+        return None, 0.0
+
+    por_trigrama = indice.get(uf, {})
+    consulta_trigramas = trigramas(consulta)
+
+    # Candidatos = municípios com maior coeficiente de Dice de trigramas
+    contagem = Counter()
+    for trigrama in consulta_trigramas:
+        contagem.update(por_trigrama.get(trigrama, ()))
+
+    dice = {
+        candidato: 2 * comum / (len(consulta_trigramas) + tamanhos[candidato])
+        for candidato, comum in contagem.items()
+    }
+    candidatos = heapq.nlargest(MAXIMO_CANDIDATOS, dice, key=dice.get)
+
+    comparador = difflib.SequenceMatcher(None, '', consulta)
+    melhor, melhor_pontuacao = None, 0.0
+    for candidato in candidatos:
+        limite = max(melhor_pontuacao, CONFIANCA_MINIMA)
+        nome = candidato.split('|', 1)[1]
+        pontuacao = pontuar_nomes(consulta, nome, comparador, limite, homonimos[palavras_significativas(nome)])
+        if pontuacao > melhor_pontuacao:
+            melhor, melhor_pontuacao = candidato, pontuacao
+
+    if melhor is None or melhor_pontuacao < CONFIANCA_MINIMA:
+        return None, melhor_pontuacao
+
+    return municipios[melhor], round(melhor_pontuacao, 3)
+
+class CacheGeocodificacao:
+    """Cache persistente (SQLite) de coordenadas por cidade+estado"""
+
+    def __init__(self, caminho=CAMINHO_CACHE, ttl=TTL_ENCONTRADA, ttl_negativo=TTL_NAO_ENCONTRADA):
+        self.caminho = caminho
+        self.ttl = ttl
+        self.ttl_negativo = ttl_negativo
+
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS coordenadas (
+                chave TEXT PRIMARY KEY,
+                cidade TEXT,
+                estado TEXT,
+                lat REAL,
+                lng REAL,
+                atualizado_em REAL
+            )
+        """)
+        self.conexao.commit()
+
+    def obter(self, cidade, estado="RS"):
+        """Retorna (encontrado_no_cache, lat, lng) respeitando o TTL"""
+        linha = self.conexao.execute(
+            "SELECT lat, lng, atualizado_em FROM coordenadas WHERE chave = ?",
+            (chave_cidade(cidade, estado),)
+        ).fetchone()
+
+        if linha is None:
+            return False, None, None
+
+        lat, lng, atualizado_em = linha
+        ttl = self.ttl if lat is not None else self.ttl_negativo
+
+        if time.time() - atualizado_em > ttl:
+            return False, None, None
+
+        return True, lat, lng
+
+    def salvar(self, cidade, estado, lat, lng):
+        """Grava o resultado de uma consulta (lat/lng None = não encontrada)"""
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO coordenadas VALUES (?, ?, ?, ?, ?, ?)",
+            (chave_cidade(cidade, estado), cidade, estado, lat, lng, time.time())
+        )
+        self.conexao.commit()
+
+    def fechar(self):
+        self.conexao.close()
+
+def obter_cache_padrao():
+    """Retorna o cache compartilhado, abrindo-o na primeira chamada"""
+    global _cache_padrao
+
+    if _cache_padrao is None:
+        _cache_padrao = CacheGeocodificacao()
+
+    return _cache_padrao
+
+class BaldeFichas:
+    """Limitador de taxa (token bucket) seguro entre threads
+
+    Acumula até `capacidade` fichas, repostas a `taxa` por segundo; cada
+    consulta gasta uma. Quem chega sem ficha reserva a próxima e dorme até ela.
+    """
+
+    def __init__(self, taxa=CONSULTAS_POR_SEGUNDO, capacidade=RAJADA_MAXIMA):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.fichas = float(capacidade)
+        self.atualizado_em = time.monotonic()
+        self.lock = threading.Lock()
+
+    def aguardar(self):
+        """Bloqueia até haver uma ficha disponível e a consome"""
+        # Reservar a ficha sob o lock (o saldo pode ficar negativo); dormir fora dele
+        with self.lock:
+            agora = time.monotonic()
+            self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado_em) * self.taxa)
+            self.atualizado_em = agora
+            self.fichas -= 1
+            espera = -self.fichas / self.taxa if self.fichas < 0 else 0.0
+
+        if espera > 0:
+            time.sleep(espera)
+
+def obter_limitador_padrao():
+    """Limitador compartilhado por todas as consultas ao Nominatim do processo"""
+    global _limitador_padrao
+
+    if _limitador_padrao is None:
+        _limitador_padrao = BaldeFichas()
+
+    return _limitador_padrao
+
+def consultar_nominatim(cidade, estado="RS", limitador=None):
+    """Consulta o Nominatim; retorna (lat, lng) ou (None, None) se não encontrada"""
+    # Respeitar rate limit da API (também quando a consulta anterior falhou)
+    with cronometro('geocodificacao.espera_limitador'):
+        (limitador or obter_limitador_padrao()).aguardar()
+    contar('geocodificacao.consultas_nominatim')
+
+    params = {
+        'q': f"{cidade}, {estado}, Brasil",
+        'format': 'json',
+        'limit': 1,
+        'countrycodes': 'br'
+    }
+
+    # Sessão própria (keep-alive com o Nominatim), dimensionada para o modo em lote
+    sessao = obter_sessao('geocodificacao', user_agent=USER_AGENT, pool_conexoes=CONSULTAS_SIMULTANEAS)
+
+    response = sessao.get(NOMINATIM_URL, params=params, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+
+    if data and len(data) > 0:
+        result = data[0]
+        return float(result['lat']), float(result['lon'])
+
+    return None, None
+
+def obter_coordenadas_cidade(cidade, estado="RS", cache=None):
+    """Obtém coordenadas lat/lng de uma cidade, consultando o cache antes da API"""
+
+    if cache is None:
+        cache = obter_cache_padrao()
+
+    # Limpar nome da cidade
+    cidade_limpa = str(cidade).split('/')[0].strip()
+
+    encontrado, lat, lng = cache.obter(cidade_limpa, estado)
+    contar('cache_geocodificacao.acertos' if encontrado else 'cache_geocodificacao.falhas')
+    if encontrado:
+        return lat, lng
+
+    try:
+        lat, lng = consultar_nominatim(cidade_limpa, estado)
+    except Exception as e:
+        # Erros de rede não são cacheados para permitir nova tentativa
+        print(f"Erro ao buscar {cidade}: {e}")
+        return None, None
+
+    cache.salvar(cidade_limpa, estado, lat, lng)
+    return lat, lng
+
+def geocodificar_cidade(cidade, estado="RS", usar_api=True):
+    """Geocodifica uma cidade: gazetteer local (exato ou aproximado), depois cache/Nominatim
+
+    Retorna (lat, lng, status, confianca), com status 'conhecida' (gazetteer),
+    'encontrada' (Nominatim) ou 'nao_encontrada'. A confiança é a similaridade
+    do nome com o município escolhido (1.0 = exato, None = resultado da API).
+    """
+    municipio, confianca = buscar_municipio_aproximado(str(cidade), str(estado))
+    if municipio is not None:
+        return municipio['lat'], municipio['lng'], 'conhecida', confianca
+
+    # Nome de estado no lugar da cidade: o Nominatim devolveria o centro do estado
+    if usar_api and normalizar_cidade(cidade) not in ESTADOS:
+        lat, lng = obter_coordenadas_cidade(cidade, estado)
+        if lat is not None and lng is not None:
+            return lat, lng, 'encontrada', None
+
+    return None, None, 'nao_encontrada', 0.0
+
+def geocodificar_em_lote(pares, usar_api=True, cache=None, limitador=None,
+                         max_concorrencia=CONSULTAS_SIMULTANEAS, ao_geocodificar=None):
+    """Geocodifica um conjunto de pares (cidade, estado) de uma vez
+
+    Pares que normalizam para a mesma chave ("Pelotas", "pelotas ", "Pelotas/RS")
+    são resolvidos uma única vez. O gazetteer local resolve o que puder; o resto
+    é procurado no cache e só as cidades que faltarem vão ao Nominatim, em
+    paralelo e limitadas pelo balde de fichas. O custo é proporcional ao número
+    de cidades distintas, não de linhas.
+
+    Retorna {(cidade, estado): (lat, lng, status, confianca)} para cada par
+    recebido, com os mesmos valores de geocodificar_cidade, mais o status
+    'erro_consulta' quando o Nominatim falhou (rede, HTTP), que ao contrário
+    de 'nao_encontrada' não fica no cache e vale tentar de novo. Se informado,
+    ao_geocodificar(cidade, resultado) é chamado uma vez por cidade distinta.
+    """
+    if cache is None and usar_api:
+        cache = obter_cache_padrao()
+
+    # Coalescer pares equivalentes
+    pares_por_chave = {}
+    for cidade, estado in pares:
+        pares_por_chave.setdefault(chave_cidade(cidade, estado), []).append((cidade, estado))
+
+    por_chave = {}
+    consultas = []
+
+    for chave, grupo in pares_por_chave.items():
+        cidade, estado = grupo[0]
+        municipio, confianca = buscar_municipio_aproximado(str(cidade), str(estado))
+
+        if municipio is not None:
+            por_chave[chave] = (municipio['lat'], municipio['lng'], 'conhecida', confianca)
+            continue
+        if not usar_api or chave.split('|', 1)[1] in ESTADOS:
+            por_chave[chave] = (None, None, 'nao_encontrada', 0.0)
+            continue
+
+        cidade_limpa = str(cidade).split('/')[0].strip()
+        encontrado, lat, lng = cache.obter(cidade_limpa, estado)
+        contar('cache_geocodificacao.acertos' if encontrado else 'cache_geocodificacao.falhas')
+        if encontrado:
+            por_chave[chave] = (lat, lng, 'encontrada', None) if lat is not None else (None, None, 'nao_encontrada', 0.0)
+        else:
+            consultas.append((chave, cidade_limpa, estado))
+
+    def consultar(consulta):
+        _, cidade_limpa, estado = consulta
+        try:
+            return consultar_nominatim(cidade_limpa, estado, limitador=limitador)
+        except Exception as e:
+            # Erros de rede não são cacheados para permitir nova tentativa
+            contar('geocodificacao.erros_nominatim')
+            print(f"Erro ao buscar {cidade_limpa}: {e}")
+            return None
+
+    def concluir(_, consulta, coordenadas):
+        # Executado na thread principal: o SQLite do cache é usado só por ela
+        chave, cidade_limpa, estado = consulta
+        if coordenadas is None:
+            por_chave[chave] = (None, None, 'erro_consulta', 0.0)
+            return
+
+        lat, lng = coordenadas
+        cache.salvar(cidade_limpa, estado, lat, lng)
+        por_chave[chave] = (lat, lng, 'encontrada', None) if lat is not None else (None, None, 'nao_encontrada', 0.0)
+
+    if consultas:
+        with cronometro('geocodificacao.nominatim'):
+            rastrear_em_paralelo(consultas, consultar, max_concorrencia=max_concorrencia, ao_concluir=concluir)
+
+    # Origem das coordenadas de cada cidade distinta (conhecida = gazetteer, encontrada = Nominatim)
+    for lat, lng, status, confianca in por_chave.values():
+        contar(f'geocodificacao.{status}')
+        if status == 'conhecida' and confianca < 1.0:
+            contar('geocodificacao.conhecida_aproximada')
+
+    resultados = {}
+    for chave, grupo in pares_por_chave.items():
+        if ao_geocodificar is not None:
+            ao_geocodificar(grupo[0][0], por_chave[chave])
+        for par in grupo:
+            resultados[par] = por_chave[chave]
+
+    return resultados
@@ -0,0 +1,234 @@
+import csv
+import difflib
+import json
+import math
+import os
+
+from geocodificacao import normalizar_cidade, remover_acentos
+from metricas import execucao
+
+# Arquivo gerado (versionado junto com o projeto)
+CAMINHO_SAIDA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'municipios_ibge.csv')
+
+# Coordenadas das sedes conferidas manualmente (antigos dicts coordenadas_conhecidas dos scripts)
+COORDENADAS_CONFERIDAS_RS = {
+    'Porto Alegre': (-30.0346, -51.2177),
+    'Caxias do Sul': (-29.1685, -51.1796),
+    'Pelotas': (-31.7654, -52.3376),
+    'Canoas': (-29.9167, -51.1833),
+    'Santa Maria': (-29.6842, -53.8069),
+    'Gravataí': (-29.9444, -50.9931),
+    'Viamão': (-30.0811, -51.0233),
+    'Novo Hamburgo': (-29.6783, -51.1306),
+    'São Leopoldo': (-29.7603, -51.1472),
+    'Rio Grande': (-32.0350, -52.0986),
+    'Alvorada': (-29.9897, -51.0839),
+    'Passo Fundo': (-28.2636, -52.4069),
+    'Sapucaia do Sul': (-29.8439, -51.1456),
+    'Uruguaiana': (-29.7547, -57.0883),
+    'Santa Cruz do Sul': (-29.7175, -52.4264),
+    'Cachoeirinha': (-29.9511, -51.0944),
+    'Bagé': (-31.3314, -54.1063),
+    'Bento Gonçalves': (-29.1654, -51.5198),
+    'Erechim': (-27.6351, -52.2739),
+    'Guaíba': (-30.1131, -51.3294),
+    'Lajeado': (-29.4672, -51.9624),
+    'Santo Ângelo': (-28.3000, -54.2670),
+    'Alegrete': (-29.7902, -55.7949),
+    'Ijuí': (-28.3879, -53.9202),
+    'Cruz Alta': (-28.6451, -53.6058),
+    'Carazinho': (-28.2982, -52.7942),
+    'Frederico Westphalen': (-27.3571, -53.3964),
+    'Horizontina': (-27.6279, -54.3090),
+    'Cerro Largo': (-28.1475, -54.7384),
+    'Casca': (-28.5653, -51.9769),
+    'Farroupilha': (-29.2265, -51.3468),
+    'Encantado': (-29.2393, -51.8745),
+    'Feliz': (-29.4523, -51.3070),
+    'Campo Bom': (-29.6784, -51.0572),
+    'Estância Velha': (-29.6530, -51.1720),
+    'Esteio': (-29.8512, -51.1779),
+    'Charqueadas': (-29.9549, -51.6250),
+    'Eldorado do Sul': (-29.9976, -51.3064),
+    'Gramado': (-29.3793, -50.8737),
+    'Capão da Canoa': (-29.7508, -50.0211),
+    'Capão do Leão': (-31.7661, -52.5013),
+    'Caçapava do Sul': (-30.5113, -53.4917),
+    'Dom Pedrito': (-30.9838, -54.6746),
+    'Itaqui': (-29.1222, -56.5551),
+    'Jaguari': (-29.4980, -54.6919),
+    'Jaguarão': (-32.5663, -53.3766),
+    'Júlio de Castilhos': (-29.2287, -53.6825),
+    'Lagoa Vermelha': (-28.2087, -51.5275),
+    'Guaporé': (-28.8472, -51.8908),
+    'Ibirubá': (-28.6302, -53.0961),
+    'Camaquã': (-30.8525, -51.8076),
+    'Cachoeira do Sul': (-30.0482, -52.8902),
+    'São Borja': (-28.6611, -56.0044),
+    'Santa Vitória do Palmar': (-33.5186, -53.3675),
+    'Restinga Seca': (-29.8167, -53.3833),
+    'Panambi': (-28.2925, -53.5019),
+    'Três Passos': (-27.4542, -53.9306),
+    'Soledade': (-28.8267, -52.5069),
+    'Venâncio Aires': (-29.6058, -52.1942),
+    'Teutônia': (-29.4533, -51.8069),
+    'Estrela': (-29.4950, -51.9644),
+    'Arroio do Meio': (-29.4069, -51.9500),
+    'Cruzeiro do Sul': (-29.5167, -51.9833),
+    'Sobradinho': (-29.4167, -53.0167),
+    'São Gabriel': (-30.3378, -54.3194),
+    'Santana do Livramento': (-30.8906, -55.5322),
+    'Taquara': (-29.6533, -50.7806),
+    'São Lourenço do Sul': (-31.3669, -51.9815),
+    'Tapes': (-30.6748, -51.3986),
+    'Vacaria': (-28.5103, -50.9356),
+    'São Luiz Gonzaga': (-28.4075, -54.9609),
+    'Sertão': (-27.9854, -52.2576),
+    'Sananduva': (-27.9499, -51.8074),
+    'Sarandi': (-27.9311, -52.8631),
+    'Palmeira das Missões': (-27.9011, -53.3136),
+    'Santa Rosa': (-27.8644, -54.4779),
+    'Santo Augusto': (-27.8526, -53.7776),
+    'Três de Maio': (-27.7799, -54.2357),
+    'São Sebastião do Caí': (-29.5912, -51.3779),
+    'Torres': (-29.3374, -49.7300)
+
+}
+
+# Municípios sem correspondência na base de coordenadas (coordenadas aproximadas da sede)
+COORDENADAS_MANUAIS = {
+    ('TO', 'tabocao'): ('Tabocão', -9.0567, -48.5225),
+    ('RN', 'januario cicco'): ('Januário Cicco', -6.1569, -35.6197),
+    ('SC', 'pescaria brava'): ('Pescaria Brava', -28.3871, -48.8862),
+    ('TO', 'sao valerio'): ('São Valério', -11.8603, -48.1400),
+}
+
+# Nome dos estados na base GeoNames
+ESTADOS_GEONAMES = {
+    'AC': 'Acre', 'AL': 'Alagoas', 'AM': 'Amazonas', 'AP': 'Amapa', 'BA': 'Bahia',
+    'CE': 'Ceara', 'DF': 'Federal District', 'ES': 'Espirito Santo', 'GO': 'Goias',
+    'MA': 'Maranhao', 'MG': 'Minas Gerais', 'MS': 'Mato Grosso do Sul', 'MT': 'Mato Grosso',
+    'PA': 'Para', 'PB': 'Paraiba', 'PE': 'Pernambuco', 'PI': 'Piaui', 'PR': 'Parana',
+    'RJ': 'Rio de Janeiro', 'RN': 'Rio Grande do Norte', 'RO': 'Rondonia', 'RR': 'Roraima',
+    'RS': 'Rio Grande do Sul', 'SC': 'Santa Catarina', 'SE': 'Sergipe', 'SP': 'Sao Paulo',
+    'TO': 'Tocantins'
+}
+
+# Distância máxima (km) entre as duas bases para aceitar o ponto da sede do GeoNames
+DISTANCIA_MAXIMA_KM = 50
+
+def _dobrar(nome):
+    """Forma comparável do nome: sem acentos, minúsculas e sem hífens"""
+    return ' '.join(remover_acentos(nome).lower().replace('-', ' ').split())
+
+def _distancia_km(lat1, lng1, lat2, lng2):
+    """Distância haversine em km"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(h))
+
+def _carregar_sedes_geonames():
+    """Pontos das sedes (cidades com mais de 1000 habitantes) da base GeoNames"""
+    import reverse_geocoder
+
+    caminho = os.path.join(os.path.dirname(reverse_geocoder.__file__), 'rg_cities1000.csv')
+    sedes = {}
+
+    with open(caminho, 'r', encoding='utf-8', newline='') as f:
+        for linha in csv.DictReader(f):
+            if linha['cc'] == 'BR':
+                chave = (linha['admin1'], _dobrar(linha['name']))
+                sedes.setdefault(chave, (float(linha['lat']), float(linha['lon'])))
+
+    return sedes
+
+def gerar_municipios_ibge():
+    """Gera o gazetteer de municípios a partir dos dados empacotados no PyPI
+
+    - Lista oficial de municípios e códigos IBGE: pacote `brutils`
+    - Coordenadas (centroides): pacote `countrystatecity-countries`
+    - Pontos das sedes, quando disponíveis: base GeoNames do pacote `reverse_geocoder`
+    """
+
+    # Dependências usadas apenas para gerar o arquivo
+    import brutils
+    import countrystatecity_countries
+
+    caminho_codigos = os.path.join(os.path.dirname(brutils.__file__), 'data', 'cities_code.json')
+    with open(caminho_codigos, 'r', encoding='utf-8') as f:
+        codigos_por_uf = json.load(f)
+
+    pasta_estados = os.path.join(
+        os.path.dirname(countrystatecity_countries.__file__), 'data', 'by-country', 'BR', 'states'
+    )
+
+    sedes = _carregar_sedes_geonames()
+    conferidas = {normalizar_cidade(nome): coords for nome, coords in COORDENADAS_CONFERIDAS_RS.items()}
+
+    municipios = []
+    sem_coordenadas = []
+    fontes = {'conferida': 0, 'geonames': 0, 'centroide': 0, 'manual': 0}
+
+    for uf, codigos in sorted(codigos_por_uf.items()):
+        with open(os.path.join(pasta_estados, uf, 'cities.json'), 'r', encoding='utf-8') as f:
+            cidades = json.load(f)
+
+        por_nome = {}
+        for cidade in cidades:
+            por_nome.setdefault(_dobrar(cidade['name']), cidade)
+
+        for nome_ibge, codigo in codigos.items():
+            chave = _dobrar(nome_ibge)
+            cidade = por_nome.get(chave)
+
+            if cidade is None:
+                # Grafias divergentes (ex: "Couto Magalhães" x "Couto de Magalhães")
+                parecidos = difflib.get_close_matches(chave, list(por_nome), 1, 0.75)
+                if parecidos:
+                    cidade = por_nome[parecidos[0]]
+
+            if cidade is not None:
+                nome = cidade['name']
+                lat, lng = float(cidade['latitude']), float(cidade['longitude'])
+                fonte = 'centroide'
+
+                sede = sedes.get((ESTADOS_GEONAMES[uf], _dobrar(nome)))
+                if sede is not None and _distancia_km(lat, lng, *sede) <= DISTANCIA_MAXIMA_KM:
+                    lat, lng = sede
+                    fonte = 'geonames'
+            elif (uf, chave) in COORDENADAS_MANUAIS:
+                nome, lat, lng = COORDENADAS_MANUAIS[(uf, chave)]
+                fonte = 'manual'
+            else:
+                sem_coordenadas.append(f"{nome_ibge}/{uf}")
+                continue
+
+            if uf == 'RS' and normalizar_cidade(nome) in conferidas:
+                lat, lng = conferidas[normalizar_cidade(nome)]
+                fonte = 'conferida'
+
+            fontes[fonte] += 1
+            municipios.append((codigo, uf, nome, round(lat, 4), round(lng, 4)))
+
+    municipios.sort()
+
+    with open(CAMINHO_SAIDA, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['codigo_ibge', 'uf', 'nome', 'latitude', 'longitude'])
+        writer.writerows(municipios)
+
+    # Relatório
+    total_rs = len([m for m in municipios if m[1] == 'RS'])
+
+    print(f"=== GAZETTEER DE MUNICÍPIOS ===")
+    print(f"Municípios gravados: {len(municipios)}")
+    print(f"Municípios do RS: {total_rs}")
+    print(f"Coordenadas por fonte: {fontes}")
+    print(f"Sem coordenadas: {len(sem_coordenadas)}")
+    for nome in sem_coordenadas:
+        print(f"- {nome}")
+    print(f"Arquivo: {CAMINHO_SAIDA}")
+
+if __name__ == "__main__":
+    with execucao('gerar_municipios_ibge'):
+        gerar_municipios_ibge()
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from caminhos import preparar_saida
+from fluxo_json import gravar_registros, ler_registros
+
+# Identidade estável de uma instituição: nome + cidade + site (sem diferenciar maiúsculas)
+COLUNAS_CHAVE = ('Nome da Instituição/Tipo', 'Cidade', 'Site')
+COLUNA_CHAVE = 'chave_instituicao'
+
+def _texto(coluna):
+    return coluna.astype(object).where(coluna.notna(), '').astype(str).str.strip()
+
+def chaves_instituicoes(df):
+    """Chave de cada linha (hash de nome + cidade + site)
+
+    Linhas repetidas recebem um sufixo com o número da ocorrência, para que
+    cada linha tenha uma chave única.
+    """
+    partes = [
+        _texto(df[coluna]).str.casefold() if coluna in df.columns else pd.Series('', index=df.index)
+        for coluna in COLUNAS_CHAVE
+    ]
+    base = partes[0].str.cat(partes[1:], sep='|')
+    chaves = base.map(lambda texto: hashlib.sha1(texto.encode('utf-8')).hexdigest()[:16])
+
+    ocorrencia = chaves.groupby(chaves).cumcount()
+    return chaves.where(ocorrencia == 0, chaves + '-' + ocorrencia.astype(str))
+
+def impressoes(df):
+    """Hash do conteúdo de cada linha (todas as colunas exceto a chave)"""
+    colunas = [coluna for coluna in df.columns if coluna != COLUNA_CHAVE]
+    valores = pd.DataFrame({coluna: _texto(df[coluna]) for coluna in colunas}, index=df.index)
+    return pd.util.hash_pandas_object(valores, index=False).map('{:016x}'.format)
+
+def versao_arquivos(*caminhos):
+    """Hash combinado de arquivos de código/dados; mudá-los invalida o estado incremental"""
+    h = hashlib.sha256()
+    for caminho in caminhos:
+        with open(caminho, 'rb') as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+def caminho_alteracoes(caminho_saida):
+    """Arquivo com o conjunto de mudanças gravado ao lado da saída completa"""
+    raiz, extensao = os.path.splitext(caminho_saida)
+    return f"{raiz}.alteracoes{extensao}"
+
+def _ler_json(caminho, padrao):
+    if not os.path.exists(caminho):
+        return padrao
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _gravar_json(dados, caminho):
+    temporario = preparar_saida(caminho) + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+def atualizar_incremental(df, processar, caminho_saida, caminho_estado, versao='', reprocessar=None):
+    """Processa apenas as linhas novas ou alteradas desde a última execução
+
+    df precisa da coluna chave_instituicao. processar(df_parcial) recebe só as
+    linhas a processar e retorna uma lista de registros na mesma ordem. As
+    demais linhas reaproveitam o registro da saída anterior, exceto aquelas
+    cujo registro anterior satisfaz reprocessar(registro) (ex: falhas que
+    podem ter sido transitórias), que são processadas de novo.
+
+    Grava a saída completa (na ordem de df), o conjunto de mudanças ao lado
+    dela e o estado (impressão de cada linha). Retorna (registros, alteracoes).
+    """
+    estado = _ler_json(caminho_estado, {})
+    impressoes_anteriores = estado.get('impressoes', {})
+
+    saida_anterior = {}
+    if os.path.exists(caminho_saida):
+        saida_anterior = {r[COLUNA_CHAVE]: r for r in ler_registros(caminho_saida) if COLUNA_CHAVE in r}
+
+    # Se o código ou os dados de referência mudaram, nenhum registro anterior é reaproveitado
+    anteriores = saida_anterior if estado.get('versao') == versao else {}
+    if reprocessar is not None:
+        anteriores = {chave: registro for chave, registro in anteriores.items() if not reprocessar(registro)}
+
+    chaves = df[COLUNA_CHAVE]
+    atuais = impressoes(df)
+
+    existia = chaves.isin(list(impressoes_anteriores))
+    inalterada = chaves.isin(list(anteriores)) & (chaves.map(impressoes_anteriores) == atuais)
+
+    # Só as linhas novas/alteradas passam pelo processamento
+    parcial = df[~inalterada]
+    novos = processar(parcial) if len(parcial) else []
+    por_chave = dict(zip(parcial[COLUNA_CHAVE], novos))
+    for registro, chave in zip(novos, parcial[COLUNA_CHAVE]):
+        registro[COLUNA_CHAVE] = chave
+
+    registros = [anteriores[chave] if ok else por_chave[chave] for chave, ok in zip(chaves, inalterada)]
+
+    # Linhas já existentes que foram processadas de novo (reprocessar, versão nova)
+    # e deram o mesmo registro não contam como alteradas
+    alteradas = []
+    refeitas_iguais = 0
+    for chave in parcial[COLUNA_CHAVE][existia[~inalterada]]:
+        if saida_anterior.get(chave) == por_chave[chave]:
+            refeitas_iguais += 1
+        else:
+            alteradas.append(por_chave[chave])
+
+    presentes = set(chaves)
+    alteracoes = {
+        'adicionadas': [por_chave[c] for c in parcial[COLUNA_CHAVE][~existia[~inalterada]]],
+        'alteradas': alteradas,
+        'removidas': [saida_anterior.get(c, {COLUNA_CHAVE: c}) for c in impressoes_anteriores if c not in presentes],
+        'inalteradas': int(inalterada.sum()) + refeitas_iguais,
+    }
+
+    gravar_registros(registros, caminho_saida)
+    _gravar_json(alteracoes, caminho_alteracoes(caminho_saida))
+    _gravar_json({'versao': versao, 'impressoes': dict(zip(chaves, atuais))}, caminho_estado)
+
+    return registros, alteracoes
+
+def resumo_alteracoes(alteracoes):
+    """Texto curto com as contagens do conjunto de mudanças"""
+    return (f"{len(alteracoes['adicionadas'])} novas, {len(alteracoes['alteradas'])} alteradas, "
+            f"{len(alteracoes['removidas'])} removidas, {alteracoes['inalteradas']} inalteradas")
@@ -0,0 +1,127 @@
+import argparse
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy é opcional: só as consultas por proximidade dependem dele
+    cKDTree = None
+
+from caminhos import CAMINHO_PAINEL
+from fluxo_json import ler_registros
+from metricas import execucao
+
+# Consultas por proximidade sobre as instituições do painel: os pontos são
+# levados para a esfera unitária (x, y, z) e indexados numa KD-tree. Nessa
+# representação a distância em linha reta (corda) cresce junto com a distância
+# ao longo da superfície, então raio e vizinhos mais próximos saem exatos.
+
+# Raio médio da Terra, em km
+RAIO_TERRA_KM = 6371.0088
+
+def _cartesianas(latitudes, longitudes):
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+def _corda(distancia_km):
+    # Corda na esfera unitária para uma distância na superfície (limitada a meia volta)
+    angulo = np.minimum(np.asarray(distancia_km, dtype=float) / RAIO_TERRA_KM, np.pi)
+    return 2 * np.sin(angulo / 2)
+
+def _distancia_km(corda):
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.minimum(np.asarray(corda, dtype=float) / 2, 1.0))
+
+class IndiceEspacial:
+    """Índice das instituições por posição, para consultas de raio e de mais próximas
+
+    Registros sem coordenadas ficam de fora. As consultas retornam listas de
+    (distancia_km, registro), da mais próxima para a mais distante.
+    """
+
+    def __init__(self, registros):
+        if cKDTree is None:
+            raise RuntimeError("consultas por proximidade requerem o pacote scipy (pip install scipy)")
+        self.registros = [r for r in registros if r.get('latitude') is not None and r.get('longitude') is not None]
+        pontos = _cartesianas([r['latitude'] for r in self.registros], [r['longitude'] for r in self.registros])
+        self.arvore = cKDTree(pontos.reshape(-1, 3))
+
+    @classmethod
+    def do_arquivo(cls, caminho=CAMINHO_PAINEL, tipos=None):
+        """Índice sobre um arquivo de registros (por padrão o data.json), opcionalmente só de alguns tipos"""
+        registros = ler_registros(caminho)
+        if tipos:
+            registros = (r for r in registros if r.get('Tipo') in tipos)
+        return cls(registros)
+
+    def __len__(self):
+        return len(self.registros)
+
+    def no_raio(self, latitude, longitude, raio_km):
+        """Instituições a até raio_km do ponto"""
+        centro = _cartesianas([latitude], [longitude])[0]
+        indices = self.arvore.query_ball_point(centro, _corda(raio_km))
+        if not indices:
+            return []
+
+        distancias = _distancia_km(np.linalg.norm(self.arvore.data[indices] - centro, axis=1))
+        ordem = np.argsort(distancias, kind='stable')
+        return [(float(distancias[i]), self.registros[indices[i]]) for i in ordem]
+
+    def mais_proximas(self, latitude, longitude, k=5):
+        """As k instituições mais próximas do ponto"""
+        k = min(k, len(self.registros))
+        if k <= 0:
+            return []
+
+        centro = _cartesianas([latitude], [longitude])[0]
+        cordas, indices = self.arvore.query(centro, k=k)
+        cordas, indices = np.atleast_1d(cordas), np.atleast_1d(indices)
+        return [(float(d), self.registros[i]) for d, i in zip(_distancia_km(cordas), indices)]
+
+def resolver_ponto(args, parser):
+    """Latitude/longitude da consulta: informadas diretamente ou pelo nome da cidade (gazetteer local)"""
+    if args.cidade:
+        from geocodificacao import geocodificar_cidade
+
+        lat, lng, status, _ = geocodificar_cidade(args.cidade, args.estado, usar_api=False)
+        if status == 'nao_encontrada':
+            parser.error(f"cidade não encontrada no gazetteer: {args.cidade}/{args.estado}")
+        return lat, lng
+
+    if args.lat is None or args.lon is None:
+        parser.error("informe --cidade ou --lat e --lon")
+    return args.lat, args.lon
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta instituições do painel por proximidade")
+    parser.add_argument('consulta', choices=['raio', 'proximas'],
+                        help="raio: todas a até --km; proximas: as -k mais próximas")
+    parser.add_argument('--cidade', help="ponto de referência pelo nome do município (ex: 'Passo Fundo')")
+    parser.add_argument('--estado', default='RS', help="UF do município (padrão: RS)")
+    parser.add_argument('--lat', type=float, help="latitude do ponto de referência")
+    parser.add_argument('--lon', type=float, help="longitude do ponto de referência")
+    parser.add_argument('--km', type=float, default=50.0, help="raio da consulta, em km (padrão: 50)")
+    parser.add_argument('-k', type=int, default=5, help="quantidade de instituições (padrão: 5)")
+    parser.add_argument('--tipo', action='append', default=[], metavar='TIPO',
+                        help="considera só este Tipo (pode repetir: --tipo ICT --tipo 'Instituto Embrapii')")
+    parser.add_argument('--arquivo', default=CAMINHO_PAINEL, help="registros com coordenadas (padrão: data.json)")
+    args = parser.parse_args()
+
+    latitude, longitude = resolver_ponto(args, parser)
+    indice = IndiceEspacial.do_arquivo(args.arquivo, tipos=set(args.tipo))
+
+    if args.consulta == 'raio':
+        resultados = indice.no_raio(latitude, longitude, args.km)
+        print(f"{len(resultados)} instituições a até {args.km:g} km de ({latitude}, {longitude}):")
+    else:
+        resultados = indice.mais_proximas(latitude, longitude, args.k)
+        print(f"{len(resultados)} instituições mais próximas de ({latitude}, {longitude}):")
+
+    for distancia, registro in resultados:
+        print(f"  {distancia:7.1f} km  {registro['Nome da Instituição/Tipo']} ({registro.get('Tipo', '')}) - "
+              f"{registro['Cidade']}/{registro['Estado']}")
+
+if __name__ == "__main__":
+    with execucao('indice_espacial'):
+        main()
@@ -0,0 +1,122 @@
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from caminhos import CAMINHO_METRICAS, preparar_saida
+
+# Métricas de execução: cronômetros (tempo total e número de chamadas por nome)
+# e contadores (requisições HTTP, bytes baixados, acertos e falhas de cache,
+# origem das coordenadas...). Cada script envolve o seu main em execucao(), que
+# acrescenta uma linha JSON em dados/metricas.jsonl ao terminar. Ficam de fora
+# o servidor_local.py (serviço de teste, roda até ser interrompido) e o
+# benchmark_pipeline.py, que mede cada etapa por conta própria num PAINEL_DADOS temporário.
+#
+# Os nomes usam pontos para agrupar (http.bytes, cache_paginas.acertos,
+# estagio.geocodificacao). Cronômetros usados em várias threads somam o tempo
+# de todas elas, então podem passar do tempo total da execução.
+
+class Metricas:
+    """Cronômetros e contadores de uma execução, seguros entre threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.contadores = Counter()
+        self.tempos = {}
+
+    def contar(self, nome, quantidade=1):
+        with self.lock:
+            self.contadores[nome] += quantidade
+
+    def registrar_tempo(self, nome, segundos):
+        with self.lock:
+            total, chamadas = self.tempos.get(nome, (0.0, 0))
+            self.tempos[nome] = (total + segundos, chamadas + 1)
+
+    @contextmanager
+    def cronometro(self, nome):
+        """Mede o bloco (inclusive quando ele termina com exceção)"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tempo(nome, time.perf_counter() - inicio)
+
+    def zerar(self):
+        with self.lock:
+            self.contadores.clear()
+            self.tempos.clear()
+
+    def resumo(self):
+        """Contadores e cronômetros em ordem alfabética, prontos para JSON"""
+        with self.lock:
+            return {
+                'tempos': {nome: {'segundos': round(total, 4), 'chamadas': chamadas}
+                           for nome, (total, chamadas) in sorted(self.tempos.items())},
+                'contadores': dict(sorted(self.contadores.items())),
+            }
+
+# Métricas do processo (compartilhadas por todos os módulos)
+_metricas = Metricas()
+
+def obter_metricas():
+    return _metricas
+
+def contar(nome, quantidade=1):
+    """Soma no contador do processo"""
+    _metricas.contar(nome, quantidade)
+
+def cronometro(nome):
+    """Cronômetro do processo: with cronometro('emails.download'): ..."""
+    return _metricas.cronometro(nome)
+
+def gravar_execucao(registro, caminho=CAMINHO_METRICAS):
+    # Uma linha por execução; o arquivo só cresce (append)
+    with open(preparar_saida(caminho), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+def _saida_do_argparse(erro):
+    # --help (código 0) e erros de uso (código 2) saem de dentro do argparse
+    traceback = erro.__traceback__
+    while traceback is not None:
+        if traceback.tb_frame.f_code.co_filename == argparse.__file__:
+            return erro.code in (0, 2)
+        traceback = traceback.tb_next
+    return False
+
+@contextmanager
+def execucao(script, caminho=CAMINHO_METRICAS):
+    """Mede a execução de um script e grava as métricas dela ao final (também em caso
+    de erro; não grava quando o argparse encerra o script com --help ou erro de uso)"""
+    _metricas.zerar()
+    inicio = time.time()
+    status = 'erro'
+
+    try:
+        with _metricas.cronometro('total'):
+            yield _metricas
+        status = 'sucesso'
+    except KeyboardInterrupt:
+        status = 'interrompido'
+        raise
+    except SystemExit as erro:
+        if _saida_do_argparse(erro):
+            status = None
+        elif erro.code in (0, None):
+            status = 'sucesso'
+        raise
+    finally:
+        if status is not None:
+            resumo = _metricas.resumo()
+            gravar_execucao({
+                'script': script,
+                'argumentos': sys.argv[1:],
+                'inicio': inicio,
+                'duracao_segundos': resumo['tempos']['total']['segundos'],
+                'status': status,
+                **resumo,
+            }, caminho)
+            print(f"\n⏱️ {script}: {resumo['tempos']['total']['segundos']:.1f}s (métricas em {caminho})")
@@ -0,0 +1,107 @@
+import pandas as pd
+from caminhos import CAMINHO_EXCEL
+from geocodificacao import ESTADOS, geocodificar_em_lote, normalizar_cidade
+from planilha import ler_planilha
+
+# Colunas da planilha e o valor usado quando a célula está vazia
+COLUNAS_PADRAO = {
+    'Cidade': 'Cidade não informada',
+    'Estado': 'RS',
+    'Abreviatura da Instituição': '',
+    'Nome da Instituição/Tipo': 'Nome não disponível',
+    'Setor': 'Outros',
+    'Contato': '',
+    'Site': '',
+    'E-mail de contato': '',
+}
+
+# Valores que representam célula vazia depois da conversão para texto
+VALORES_VAZIOS = ['nan', 'NaN', 'None', '']
+
+CIDADE_NAO_INFORMADA = COLUNAS_PADRAO['Cidade']
+
+def normalizar_estados(estados):
+    """Converte nomes por extenso ('Rio Grande do Sul') em siglas; siglas ficam em maiúsculas"""
+    # Poucos valores distintos: normalizar cada um uma vez e mapear a coluna inteira
+    distintos = estados.unique()
+    mapa = {}
+    for estado in distintos:
+        chave = normalizar_cidade(estado)
+        mapa[estado] = ESTADOS.get(chave, estado.upper() if len(estado) == 2 else estado)
+
+    return estados.map(mapa)
+
+def normalizar_planilha(df):
+    """Limpa a planilha em uma única passada por coluna
+
+    Todas as colunas de COLUNAS_PADRAO saem como texto sem espaços nas pontas,
+    com o valor padrão no lugar das células vazias; o estado sai como sigla.
+    """
+    limpo = pd.DataFrame(index=df.index)
+
+    for coluna, padrao in COLUNAS_PADRAO.items():
+        if coluna not in df.columns:
+            limpo[coluna] = padrao
+            continue
+
+        valores = df[coluna].astype(object).where(df[coluna].notna(), '').astype(str).str.strip()
+        limpo[coluna] = valores.mask(valores.isin(VALORES_VAZIOS), padrao)
+
+    limpo['Estado'] = normalizar_estados(limpo['Estado'])
+
+    return limpo.reset_index(drop=True)
+
+def carregar_planilha(caminho=CAMINHO_EXCEL):
+    """Lê a planilha de instituições e retorna o frame normalizado"""
+    return normalizar_planilha(ler_planilha(caminho))
+
+def adicionar_coordenadas(df, usar_api=True, status_sem_cidade='nao_processada', confianca_sem_cidade=None,
+                          ao_geocodificar=None, apenas_rs=True):
+    """Acrescenta latitude, longitude, coordenadas_status e coordenadas_confianca
+
+    Cada par cidade+estado distinto é geocodificado uma única vez e o
+    resultado é mapeado para todas as linhas. Com apenas_rs, instituições de
+    outros estados ficam como 'fora_rs'. Se informado,
+    ao_geocodificar(cidade, resultado) é chamado uma vez por cidade.
+    """
+    df = df.copy()
+
+    geocodificar = df['Estado'] == 'RS' if apenas_rs else pd.Series(True, index=df.index)
+    com_cidade = geocodificar & (df['Cidade'] != CIDADE_NAO_INFORMADA)
+
+    # "Pelotas/RS" -> "Pelotas"; a chave inclui o estado para não misturar homônimos
+    cidades = df['Cidade'].str.split('/').str[0].str.strip()
+    chaves = df['Estado'] + '|' + cidades
+
+    # Todas as cidades de uma vez: gazetteer local, cache e, para o resto, Nominatim em lote
+    pares = {chave: tuple(chave.split('|', 1)[::-1]) for chave in chaves[com_cidade].unique()}
+    lote = geocodificar_em_lote(pares.values(), usar_api=usar_api, ao_geocodificar=ao_geocodificar)
+    resultados = {chave: lote[par] for chave, par in pares.items()}
+
+    # Resultado por cidade distinta, replicado para as linhas via reindex
+    colunas = ['latitude', 'longitude', 'coordenadas_status', 'coordenadas_confianca']
+    por_cidade = pd.DataFrame.from_dict(resultados, orient='index', columns=colunas, dtype=object)
+    coordenadas = por_cidade.reindex(chaves.where(com_cidade)).set_axis(df.index).astype(object)
+
+    coordenadas.loc[geocodificar & ~com_cidade, 'coordenadas_status'] = status_sem_cidade
+    coordenadas.loc[geocodificar & ~com_cidade, 'coordenadas_confianca'] = confianca_sem_cidade
+    coordenadas.loc[~geocodificar, 'coordenadas_status'] = 'fora_rs'
+
+    return pd.concat([df, coordenadas], axis=1)
+
+def para_registros(df):
+    """Converte o frame em lista de dicionários (NaN vira None, pronto para JSON)"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+def informar_geocodificacao(cidade, resultado):
+    """Mostra o resultado da geocodificação de uma cidade (uso com ao_geocodificar)"""
+    lat, lng, status, confianca = resultado
+
+    if status == 'encontrada':
+        print(f"  ✅ Coordenadas encontradas para {cidade}: {lat}, {lng}")
+    elif status == 'conhecida' and confianca < 1.0:
+        print(f"  🔎 Correspondência aproximada ({confianca:.0%}): {cidade}")
+    elif status == 'nao_encontrada':
+        print(f"  ⚠️ Cidade não encontrada: {cidade}")
+    elif status == 'erro_consulta':
+        print(f"  ⚠️ Falha ao consultar o Nominatim (será repetida): {cidade}")
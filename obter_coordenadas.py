@@ -1,123 +1,78 @@
 import json
-import requests
-import time
-from collections import defaultdict
+from caminhos import CAMINHO_INSTITUICOES, caminho_dados, preparar_saida
+from fluxo_json import gravar_registros, ler_registros
+from geocodificacao import geocodificar_em_lote
+from metricas import execucao
 
-def obter_coordenadas_cidade(cidade, estado="RS"):
-    """Obtém coordenadas lat/lng de uma cidade usando API de geocodificação"""
-    
-    # Usar Nominatim (OpenStreetMap) - gratuito e sem necessidade de API key
-    base_url = "https://nominatim.openstreetmap.org/search"
-    
-    # Preparar query
-    query = f"{cidade}, {estado}, Brasil"
-    
-    params = {
-        'q': query,
-        'format': 'json',
-        'limit': 1,
-        'countrycodes': 'br'
-    }
-    
-    headers = {
-        'User-Agent': 'Painel-Instituicoes-RS/1.0 (contato@exemplo.com)'
-    }
-    
-    try:
-        response = requests.get(base_url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        if data and len(data) > 0:
-            result = data[0]
-            lat = float(result['lat'])
-            lng = float(result['lon'])
-            
-            print(f"✅ {cidade}: {lat}, {lng}")
-            return lat, lng
-        else:
-            print(f"❌ {cidade}: Não encontrada")
-            return None, None
-            
-    except Exception as e:
-        print(f"❌ {cidade}: Erro - {e}")
-        return None, None
+def combinar_coordenadas(inst, coordenadas_cidades):
+    """Copia a instituição acrescentando as coordenadas da sua cidade"""
+    cidade = inst.get('Cidade', '').strip()
+    
+    # Copiar dados da instituição
+    dados_inst = dict(inst)
+    
+    # Adicionar coordenadas se disponíveis
+    if cidade in coordenadas_cidades:
+        coords = coordenadas_cidades[cidade]
+        dados_inst['latitude'] = coords['lat']
+        dados_inst['longitude'] = coords['lng']
+        dados_inst['coordenadas_status'] = coords['status']
+        dados_inst['coordenadas_confianca'] = coords['confianca']
+    else:
+        dados_inst['latitude'] = None
+        dados_inst['longitude'] = None
+        dados_inst['coordenadas_status'] = 'nao_processada'
+    
+    return dados_inst
 
 def processar_coordenadas():
     """Processa todas as cidades e obtém suas coordenadas"""
     
-    # Carregar dados das instituições
-    with open('/home/ubuntu/instituicoes_data.json', 'r', encoding='utf-8') as f:
-        instituicoes = json.load(f)
-    
-    # Obter lista única de cidades
+    # Obter lista única de cidades (primeira leitura, registro a registro)
     cidades_unicas = set()
-    for inst in instituicoes:
+    for inst in ler_registros(CAMINHO_INSTITUICOES):
         cidade = inst.get('Cidade', '').strip()
         if cidade:
             cidades_unicas.add(cidade)
     
     print(f"Processando coordenadas para {len(cidades_unicas)} cidades únicas...")
     
-    # Dicionário para armazenar coordenadas
-    coordenadas_cidades = {}
-    
-    # Processar cada cidade
-    for i, cidade in enumerate(sorted(cidades_unicas)):
-        print(f"\n[{i+1}/{len(cidades_unicas)}] Processando: {cidade}")
-        
-        lat, lng = obter_coordenadas_cidade(cidade)
-        
+    def informar(cidade, resultado):
+        lat, lng, status, _ = resultado
         if lat is not None and lng is not None:
-            coordenadas_cidades[cidade] = {
-                'lat': lat,
-                'lng': lng,
-                'status': 'encontrada'
-            }
+            print(f"✅ {cidade}: {lat}, {lng} ({status})")
         else:
-            coordenadas_cidades[cidade] = {
-                'lat': None,
-                'lng': None,
-                'status': 'nao_encontrada'
-            }
-        
-        # Pausa para respeitar rate limit da API
-        time.sleep(1)
+            print(f"❌ {cidade}: Não encontrada")
+    
+    # Todas as cidades de uma vez (nomes equivalentes são consultados uma única vez)
+    resultados = geocodificar_em_lote(((cidade, 'RS') for cidade in cidades_unicas), ao_geocodificar=informar)
+    
+    # Dicionário para armazenar coordenadas
+    coordenadas_cidades = {}
+    for cidade in sorted(cidades_unicas):
+        lat, lng, status, confianca = resultados[(cidade, 'RS')]
+        coordenadas_cidades[cidade] = {
+            'lat': lat,
+            'lng': lng,
+            'status': status,
+            'confianca': confianca
+        }
     
     # Salvar coordenadas
-    with open('/home/ubuntu/coordenadas_cidades.json', 'w', encoding='utf-8') as f:
+    with open(preparar_saida(caminho_dados('coordenadas_cidades.json')), 'w', encoding='utf-8') as f:
         json.dump(coordenadas_cidades, f, ensure_ascii=False, indent=2)
     
-    # Criar dados finais combinando instituições com coordenadas
-    dados_finais = []
-    
-    for inst in instituicoes:
-        cidade = inst.get('Cidade', '').strip()
-        
-        # Copiar dados da instituição
-        dados_inst = dict(inst)
-        
-        # Adicionar coordenadas se disponíveis
-        if cidade in coordenadas_cidades:
-            coords = coordenadas_cidades[cidade]
-            dados_inst['latitude'] = coords['lat']
-            dados_inst['longitude'] = coords['lng']
-            dados_inst['coordenadas_status'] = coords['status']
-        else:
-            dados_inst['latitude'] = None
-            dados_inst['longitude'] = None
-            dados_inst['coordenadas_status'] = 'nao_processada'
-        
-        dados_finais.append(dados_inst)
+    # Criar dados finais combinando instituições com coordenadas (segunda leitura, em fluxo)
+    def dados_finais():
+        for inst in ler_registros(CAMINHO_INSTITUICOES):
+            yield combinar_coordenadas(inst, coordenadas_cidades)
     
     # Salvar dados finais
-    with open('/home/ubuntu/instituicoes_com_coordenadas.json', 'w', encoding='utf-8') as f:
-        json.dump(dados_finais, f, ensure_ascii=False, indent=2)
+    gravar_registros(dados_finais(), caminho_dados('instituicoes_com_coordenadas.json'))
     
     # Relatório
     total_cidades = len(cidades_unicas)
-    cidades_encontradas = len([c for c in coordenadas_cidades.values() if c['status'] == 'encontrada'])
+    cidades_encontradas = len([c for c in coordenadas_cidades.values() if c['status'] != 'nao_encontrada'])
     
     print(f"\n=== RELATÓRIO DE COORDENADAS ===")
     print(f"Total de cidades: {total_cidades}")
@@ -135,5 +90,6 @@ def processar_coordenadas():
             print(f"- {cidade}")
 
 if __name__ == "__main__":
-    processar_coordenadas()
+    with execucao('obter_coordenadas'):
+        processar_coordenadas()
 
@@ -0,0 +1,284 @@
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from agrupamento import caminhos_agrupamentos
+from caminhos import (CAMINHO_EMAILS, CAMINHO_ESPALHADAS, CAMINHO_ESTADO_PIPELINE, CAMINHO_EXCEL, CAMINHO_GEOCODIFICADAS,
+                      CAMINHO_INSTITUICOES, CAMINHO_NORMALIZADAS, CAMINHO_PAINEL_COMPACTO_GERADO, CAMINHO_PAINEL_GERADO,
+                      DIRETORIO_AGRUPAMENTOS_GERADOS, RAIZ, caminho_dados, preparar_saida)
+from fluxo_json import gravar_registros, ler_registros
+from incremental import (COLUNA_CHAVE, atualizar_incremental, caminho_alteracoes, chaves_instituicoes,
+                         resumo_alteracoes, versao_arquivos)
+from metricas import contar, cronometro, execucao
+from planilha import hash_arquivo, ler_planilha
+
+# Pipeline do painel: cada estágio declara entradas e saídas e só é executado
+# novamente quando o conteúdo (hash) de alguma delas mudou desde a última vez.
+
+# Status de geocodificação refeitos a cada execução: falhas de rede/HTTP do Nominatim,
+# que podem ser passageiras. Cidade em branco (nao_processada) e cidade que o
+# Nominatim não conhece (nao_encontrada, no cache) dariam o mesmo resultado de novo.
+STATUS_REPETIR_GEOCODIFICACAO = {'erro_consulta'}
+
+def codigo(*modulos):
+    """Caminhos dos arquivos de código de um estágio (também contam como entradas)"""
+    return [os.path.join(RAIZ, modulo) for modulo in modulos]
+
+def ler_json(caminho):
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def ingerir():
+    """Planilha -> registros brutos (células vazias como '') com a chave de cada instituição"""
+    df = ler_planilha(CAMINHO_EXCEL)
+    df[COLUNA_CHAVE] = chaves_instituicoes(df)
+    gravar_registros(df.astype(object).where(df.notna(), '').to_dict('records'), CAMINHO_INSTITUICOES)
+
+def normalizar():
+    """Registros brutos -> colunas limpas, valores padrão e estado como sigla
+
+    Só as linhas novas ou alteradas desde a última execução são normalizadas.
+    """
+    from normalizacao import normalizar_planilha, para_registros
+
+    df = pd.DataFrame(ler_registros(CAMINHO_INSTITUICOES))
+    _, alteracoes = atualizar_incremental(
+        df, lambda parcial: para_registros(normalizar_planilha(parcial)),
+        CAMINHO_NORMALIZADAS, caminho_dados('estado_normalizacao.json'),
+        versao=versao_arquivos(*codigo('normalizacao.py'))
+    )
+    print(f"Instituições: {resumo_alteracoes(alteracoes)}")
+
+def falha_de_consulta(registro):
+    """Indica se a geocodificação do registro falhou por erro do Nominatim (vale repetir)"""
+    return registro.get('coordenadas_status') in STATUS_REPETIR_GEOCODIFICACAO
+
+def geocodificar():
+    """Coordenadas por cidade distinta (gazetteer local, Nominatim com cache para o resto)
+
+    Só as linhas novas ou alteradas desde a última execução são geocodificadas,
+    mais as que ficaram sem coordenadas por falha na consulta ao Nominatim.
+    """
+    from normalizacao import adicionar_coordenadas, informar_geocodificacao, para_registros
+
+    def processar(parcial):
+        return para_registros(adicionar_coordenadas(parcial, apenas_rs=False, ao_geocodificar=informar_geocodificacao))
+
+    df = pd.DataFrame(ler_registros(CAMINHO_NORMALIZADAS))
+    _, alteracoes = atualizar_incremental(
+        df, processar, CAMINHO_GEOCODIFICADAS, caminho_dados('estado_geocodificacao.json'),
+        versao=versao_arquivos(*codigo('normalizacao.py', 'geocodificacao.py', 'municipios_ibge.csv')),
+        reprocessar=falha_de_consulta
+    )
+    print(f"Geocodificação: {resumo_alteracoes(alteracoes)}")
+
+def geocodificacoes_pendentes():
+    """Motivo para repetir a geocodificação: consultas ao Nominatim que falharam"""
+    pendentes = sum(1 for registro in ler_registros(CAMINHO_GEOCODIFICADAS) if falha_de_consulta(registro))
+    return f"{pendentes} instituições com falha na consulta ao Nominatim" if pendentes else None
+
+def espalhar():
+    """Separa as instituições com coordenadas idênticas (mesma cidade) numa espiral em torno do ponto"""
+    from espalhamento import espalhar_coordenadas
+    from normalizacao import para_registros
+
+    df = espalhar_coordenadas(pd.DataFrame(ler_registros(CAMINHO_GEOCODIFICADAS)))
+    gravar_registros(para_registros(df), CAMINHO_ESPALHADAS)
+
+    deslocadas = (df['latitude'] != df['latitude_centro']) | (df['longitude'] != df['longitude_centro'])
+    print(f"Espalhamento: {int(deslocadas.sum())} de {len(df)} instituições deslocadas")
+
+def buscar_emails(recomecar=False):
+    """Busca emails nos sites das instituições que não têm um na planilha
+
+    Sem recomecar, retoma pelo diário: só rastreia os sites pendentes, com erro
+    ou concluídos há mais de IDADE_MAXIMA_DIARIO.
+    """
+    from buscar_emails import processar_instituicoes
+
+    processar_instituicoes(caminho_instituicoes=CAMINHO_NORMALIZADAS, caminho_saida=CAMINHO_EMAILS, recomecar=recomecar)
+
+def buscar_emails_novamente():
+    """Estágio emails forçado: rastreia todos os sites de novo, ignorando o diário"""
+    buscar_emails(recomecar=True)
+
+def exportar():
+    """Instituições geocodificadas (já espalhadas) + emails encontrados -> painel em dados/painel/
+
+    Não sobrescreve o data.json publicado (curado à mão); ver caminhos.DIRETORIO_PAINEL_GERADO.
+    """
+    from agrupamento import agrupar, gravar_agrupamentos
+    from exportacao import PainelCompacto, montar_painel, salvar_painel, salvar_painel_compacto
+
+    emails_por_site = {}
+    if os.path.exists(CAMINHO_EMAILS):
+        for resultado in ler_registros(CAMINHO_EMAILS):
+            emails_por_site[resultado['site']] = resultado['emails_encontrados']
+
+    # Instituições lidas, convertidas e gravadas uma a uma; o compacto acumula só as colunas
+    compacto = PainelCompacto()
+    registros = montar_painel(ler_registros(CAMINHO_ESPALHADAS), emails_por_site)
+    total = salvar_painel(compacto.registrar(registros), CAMINHO_PAINEL_GERADO)
+    salvar_painel_compacto(compacto, CAMINHO_PAINEL_COMPACTO_GERADO)
+    print(f"{total} instituições exportadas para {CAMINHO_PAINEL_GERADO} e {CAMINHO_PAINEL_COMPACTO_GERADO}")
+
+    niveis = agrupar(compacto.colunas['latitude'], compacto.colunas['longitude'])
+    gravar_agrupamentos(niveis, DIRETORIO_AGRUPAMENTOS_GERADOS)
+    print(f"Agrupamentos: {', '.join(f'z{zoom}={len(a)}' for zoom, a in niveis.items())}")
+
+class Estagio:
+    """Etapa do pipeline com entradas e saídas declaradas
+
+    executar_forcado, se informado, é chamado no lugar de executar quando o
+    estágio é forçado (--forcar), para estágios que mantêm estado próprio.
+    pendencias(), se informado, dá um motivo para repetir o estágio mesmo com
+    as entradas inalteradas (ou None).
+    """
+
+    def __init__(self, nome, executar, entradas, saidas, executar_forcado=None, pendencias=None):
+        self.nome = nome
+        self.executar = executar
+        self.entradas = entradas
+        self.saidas = saidas
+        self.executar_forcado = executar_forcado or executar
+        self.pendencias = pendencias
+
+# Em ordem topológica: cada estágio só depende de saídas de estágios anteriores
+ESTAGIOS = [
+    Estagio('ingestao', ingerir,
+            [CAMINHO_EXCEL] + codigo('pipeline.py', 'incremental.py', 'planilha.py', 'fluxo_json.py'),
+            [CAMINHO_INSTITUICOES]),
+    Estagio('normalizacao', normalizar,
+            [CAMINHO_INSTITUICOES] + codigo('normalizacao.py', 'incremental.py', 'fluxo_json.py'),
+            [CAMINHO_NORMALIZADAS, caminho_alteracoes(CAMINHO_NORMALIZADAS)]),
+    Estagio('geocodificacao', geocodificar,
+            [CAMINHO_NORMALIZADAS] + codigo('normalizacao.py', 'geocodificacao.py', 'municipios_ibge.csv', 'incremental.py',
+                                          'fluxo_json.py'),
+            [CAMINHO_GEOCODIFICADAS, caminho_alteracoes(CAMINHO_GEOCODIFICADAS)],
+            pendencias=geocodificacoes_pendentes),
+    Estagio('espalhamento', espalhar,
+            [CAMINHO_GEOCODIFICADAS] + codigo('espalhamento.py', 'exportacao.py', 'incremental.py', 'fluxo_json.py'),
+            [CAMINHO_ESPALHADAS]),
+    Estagio('emails', buscar_emails,
+            [CAMINHO_NORMALIZADAS] + codigo('buscar_emails.py', 'classificacao_emails.py', 'extracao_emails.py', 'fronteira.py',
+                                          'fluxo_json.py'),
+            [CAMINHO_EMAILS], executar_forcado=buscar_emails_novamente),
+    Estagio('exportacao', exportar,
+            [CAMINHO_ESPALHADAS, CAMINHO_EMAILS] + codigo('exportacao.py', 'agrupamento.py', 'fluxo_json.py'),
+            [CAMINHO_PAINEL_GERADO, CAMINHO_PAINEL_COMPACTO_GERADO] + caminhos_agrupamentos(DIRETORIO_AGRUPAMENTOS_GERADOS)),
+]
+
+def carregar_estado(caminho=CAMINHO_ESTADO_PIPELINE):
+    """Hashes registrados na última execução de cada estágio"""
+    if not os.path.exists(caminho):
+        return {}
+    return ler_json(caminho)
+
+def salvar_estado(estado, caminho=CAMINHO_ESTADO_PIPELINE):
+    # Gravar em arquivo temporário e renomear: o estado nunca fica pela metade
+    temporario = preparar_saida(caminho) + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+def motivo_execucao(estagio, estado):
+    """Motivo para (re)executar o estágio, ou None se ele está atualizado"""
+    anterior = estado.get(estagio.nome)
+    if anterior is None:
+        return 'nunca executado'
+
+    for caminho in estagio.entradas:
+        if anterior['entradas'].get(caminho) != hash_arquivo(caminho):
+            return f"entrada alterada: {os.path.relpath(caminho, RAIZ)}"
+
+    for caminho in estagio.saidas:
+        atual = hash_arquivo(caminho)
+        if atual is None:
+            return f"saída ausente: {os.path.relpath(caminho, RAIZ)}"
+        if anterior['saidas'].get(caminho) != atual:
+            return f"saída alterada fora do pipeline: {os.path.relpath(caminho, RAIZ)}"
+
+    if estagio.pendencias is not None:
+        return estagio.pendencias()
+
+    return None
+
+def selecionar_estagios(nomes):
+    """Estágios pedidos e todos os que produzem suas entradas, em ordem de execução"""
+    if not nomes:
+        return list(ESTAGIOS)
+
+    por_nome = {estagio.nome: estagio for estagio in ESTAGIOS}
+    desconhecidos = [nome for nome in nomes if nome not in por_nome]
+    if desconhecidos:
+        raise ValueError(f"Estágios desconhecidos: {', '.join(desconhecidos)}")
+
+    produtor = {saida: estagio for estagio in ESTAGIOS for saida in estagio.saidas}
+    necessarios = set()
+    pendentes = [por_nome[nome] for nome in nomes]
+
+    while pendentes:
+        estagio = pendentes.pop()
+        if estagio.nome in necessarios:
+            continue
+        necessarios.add(estagio.nome)
+        pendentes.extend(produtor[e] for e in estagio.entradas if e in produtor)
+
+    return [estagio for estagio in ESTAGIOS if estagio.nome in necessarios]
+
+def executar_pipeline(nomes=None, forcar=(), pular=(), apenas_status=False):
+    """Executa os estágios desatualizados (e os forçados), na ordem das dependências"""
+    estado = carregar_estado()
+
+    for estagio in selecionar_estagios(nomes):
+        forcado = estagio.nome in forcar
+        motivo = 'forçado' if forcado else motivo_execucao(estagio, estado)
+
+        if motivo is None:
+            contar('estagios.atualizados')
+            print(f"✅ {estagio.nome}: atualizado")
+            continue
+        if apenas_status or estagio.nome in pular:
+            print(f"⏭️ {estagio.nome}: desatualizado ({motivo})")
+            continue
+
+        print(f"\n▶️ {estagio.nome}: executando ({motivo})")
+        inicio = time.perf_counter()
+        with cronometro(f'estagio.{estagio.nome}'):
+            (estagio.executar_forcado if forcado else estagio.executar)()
+        contar('estagios.executados')
+
+        # Hashes das entradas e saídas após a execução (as saídas podem ser entradas adiante)
+        estado[estagio.nome] = {
+            'entradas': {caminho: hash_arquivo(caminho) for caminho in estagio.entradas},
+            'saidas': {caminho: hash_arquivo(caminho) for caminho in estagio.saidas},
+            'executado_em': time.time(),
+        }
+        salvar_estado(estado)
+        print(f"✅ {estagio.nome}: concluído em {time.perf_counter() - inicio:.1f}s")
+
+def main():
+    nomes_estagios = [estagio.nome for estagio in ESTAGIOS]
+
+    parser = argparse.ArgumentParser(description="Pipeline de dados do painel de instituições")
+    parser.add_argument('estagios', nargs='*', metavar='ESTAGIO',
+                        help=f"estágios a atualizar (com suas dependências): {', '.join(nomes_estagios)}")
+    parser.add_argument('--forcar', action='append', default=[], metavar='ESTAGIO', choices=nomes_estagios,
+                        help="executa o estágio mesmo sem mudanças (ex: --forcar emails rastreia todos os sites de novo)")
+    parser.add_argument('--pular', action='append', default=[], metavar='ESTAGIO', choices=nomes_estagios,
+                        help="não executa o estágio; usa as saídas que já existirem")
+    parser.add_argument('--status', action='store_true', help="apenas mostra o que está desatualizado")
+    args = parser.parse_args()
+
+    desconhecidos = [nome for nome in args.estagios if nome not in nomes_estagios]
+    if desconhecidos:
+        parser.error(f"estágios desconhecidos: {', '.join(desconhecidos)}")
+
+    with execucao('pipeline'):
+        executar_pipeline(args.estagios, forcar=args.forcar, pular=args.pular, apenas_status=args.status)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import pickle
+
+import pandas as pd
+
+from caminhos import CAMINHO_EXCEL, caminho_dados, preparar_saida
+from metricas import contar, cronometro
+
+# Formato do snapshot; mudar o número descarta os snapshots antigos
+VERSAO_SNAPSHOT = 1
+
+def caminho_snapshot(caminho_excel):
+    """Arquivo do snapshot de uma planilha no diretório de dados"""
+    nome = os.path.splitext(os.path.basename(caminho_excel))[0]
+    return caminho_dados(f"{nome}.snapshot.pkl")
+
+def hash_arquivo(caminho):
+    """SHA-256 do conteúdo de um arquivo, ou None se ele não existe"""
+    if not os.path.exists(caminho):
+        return None
+
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def _carregar_snapshot(caminho):
+    try:
+        with open(caminho, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+    if not isinstance(snapshot, dict) or snapshot.get('versao') != VERSAO_SNAPSHOT:
+        return None
+    return snapshot
+
+def _salvar_snapshot(snapshot, caminho):
+    # Gravar em arquivo temporário e renomear: um snapshot pela metade nunca é lido
+    temporario = preparar_saida(caminho) + '.tmp'
+    with open(temporario, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, caminho)
+
+def ler_planilha(caminho=CAMINHO_EXCEL, usar_snapshot=True):
+    """Lê a planilha, usando o snapshot em cache quando ela não mudou
+
+    O openpyxl só é chamado quando a planilha é nova ou mudou de conteúdo.
+    Data de modificação e tamanho iguais aos do snapshot bastam; se só a data
+    mudou (arquivo copiado ou salvo sem alterações), o hash do conteúdo decide
+    e o snapshot é reaproveitado.
+    """
+    if not usar_snapshot:
+        with cronometro('planilha.excel'):
+            return pd.read_excel(caminho)
+
+    info = os.stat(caminho)
+    destino = caminho_snapshot(caminho)
+    snapshot = _carregar_snapshot(destino)
+
+    if snapshot is not None:
+        if snapshot['mtime_ns'] == info.st_mtime_ns and snapshot['tamanho'] == info.st_size:
+            contar('planilha.snapshot.acertos')
+            return snapshot['df']
+
+        conteudo = hash_arquivo(caminho)
+        if snapshot['sha256'] == conteudo:
+            # Mesmo conteúdo com outra data: só atualizar a chave rápida
+            snapshot.update(mtime_ns=info.st_mtime_ns, tamanho=info.st_size)
+            _salvar_snapshot(snapshot, destino)
+            contar('planilha.snapshot.acertos')
+            return snapshot['df']
+    else:
+        conteudo = hash_arquivo(caminho)
+
+    contar('planilha.snapshot.falhas')
+    with cronometro('planilha.excel'):
+        df = pd.read_excel(caminho)
+    _salvar_snapshot({
+        'versao': VERSAO_SNAPSHOT,
+        'mtime_ns': info.st_mtime_ns,
+        'tamanho': info.st_size,
+        'sha256': conteudo,
+        'df': df,
+    }, destino)
+
+    return df
@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+# Limite global de sites visitados ao mesmo tempo
+MAX_CONCORRENCIA = 16
+
+# Intervalo mínimo entre requisições ao mesmo host (em segundos)
+INTERVALO_POR_HOST = 1.0
+
+# Idade máxima de um registro do diário (em segundos): sites concluídos há mais
+# tempo são rastreados de novo (30 dias)
+IDADE_MAXIMA_DIARIO = 30 * 24 * 3600
+
+def host_da_url(url):
+    """Retorna o host (em minúsculas) de uma URL"""
+    return (urlparse(url).hostname or '').lower()
+
+class LimitadorPorHost:
+    """Garante um intervalo mínimo entre requisições ao mesmo host, entre threads"""
+
+    def __init__(self, intervalo=INTERVALO_POR_HOST):
+        self.intervalo = intervalo
+        self.proxima_liberacao = {}
+        self.lock = threading.Lock()
+
+    def aguardar(self, url):
+        """Bloqueia até que seja permitido requisitar o host da URL"""
+        host = host_da_url(url)
+
+        # Reservar o próximo horário livre do host sob o lock; dormir fora dele
+        with self.lock:
+            agora = time.monotonic()
+            inicio = max(agora, self.proxima_liberacao.get(host, 0.0))
+            self.proxima_liberacao[host] = inicio + self.intervalo
+
+        espera = inicio - agora
+        if espera > 0:
+            time.sleep(espera)
+
+def rastrear_em_paralelo(itens, funcao, max_concorrencia=MAX_CONCORRENCIA, ao_concluir=None, interrompido=None):
+    """Executa funcao(item) para cada item em paralelo, com limite global de concorrência
+
+    Retorna os resultados na ordem original dos itens. Se informado,
+    ao_concluir(indice, item, resultado) é chamado a cada item concluído
+    (na thread principal, em ordem de conclusão).
+
+    Numa interrupção (Ctrl-C ou exceção), os itens ainda na fila são
+    cancelados e só os que estão em andamento são aguardados; o evento
+    interrompido, se informado, é sinalizado para que eles terminem cedo.
+    """
+    resultados = [None] * len(itens)
+    executor = ThreadPoolExecutor(max_workers=max_concorrencia)
+
+    try:
+        futuros = {executor.submit(funcao, item): i for i, item in enumerate(itens)}
+
+        for futuro in as_completed(futuros):
+            i = futuros[futuro]
+            resultados[i] = futuro.result()
+
+            if ao_concluir is not None:
+                ao_concluir(i, itens[i], resultados[i])
+    except BaseException:
+        if interrompido is not None:
+            interrompido.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+
+    executor.shutdown()
+    return resultados
+
+class DiarioRastreamento:
+    """Diário append-only (JSONL) com o status de cada site rastreado
+
+    Cada linha é um registro independente; em caso de repetição vale o mais
+    recente. Gravar um registro custa O(1), independente do tamanho da execução.
+    Ao fim de um rastreamento completo, compactar() deixa só o último registro
+    de cada site, para o diário não crescer a cada retomada.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.registros = {}
+        self.lock = threading.Lock()
+
+        if os.path.exists(caminho):
+            with open(caminho, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    linha = linha.strip()
+                    if not linha:
+                        continue
+                    try:
+                        registro = json.loads(linha)
+                    except json.JSONDecodeError:
+                        # Última linha truncada por uma interrupção: descartar
+                        continue
+                    self.registros[registro['site']] = registro
+
+        self.arquivo = open(caminho, 'a', encoding='utf-8')
+
+        # Isolar uma eventual linha truncada para não corromper o próximo registro
+        if self.arquivo.tell() > 0:
+            with open(caminho, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self.arquivo.write('\n')
+
+    def concluido(self, site, idade_maxima=IDADE_MAXIMA_DIARIO):
+        """Indica se o site foi rastreado com sucesso (com ou sem emails) há no máximo idade_maxima segundos"""
+        registro = self.registros.get(site)
+        if registro is None or registro['status'] == 'erro':
+            return False
+        return time.time() - registro.get('registrado_em', 0) <= idade_maxima
+
+    def registrar(self, registro):
+        """Acrescenta um registro ao diário e o grava imediatamente em disco (seguro entre threads)"""
+        registro = dict(registro, registrado_em=time.time())
+
+        with self.lock:
+            self.registros[registro['site']] = registro
+            self.arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            self.arquivo.flush()
+            os.fsync(self.arquivo.fileno())
+
+    def compactar(self):
+        """Reescreve o diário só com o registro mais recente de cada site (gravação atômica)"""
+        temporario = self.caminho + '.tmp'
+
+        with self.lock:
+            with open(temporario, 'w', encoding='utf-8') as f:
+                for registro in self.registros.values():
+                    f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+            self.arquivo.close()
+            os.replace(temporario, self.caminho)
+            self.arquivo = open(self.caminho, 'a', encoding='utf-8')
+
+    def fechar(self):
+        self.arquivo.close()
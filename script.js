@@ -3,6 +3,10 @@ let map;
 let instituicoes = [];
 let filteredInstituicoes = [];
 let markersLayer;
+let facetas = null; // Valores e contagens dos filtros (vêm prontos no data.min.json)
+let searchIndex = null; // Índice invertido da busca: { termos: [...ordenados], linhas: [[...], ...] }
+let clustersPorZoom = {}; // Agrupamentos carregados: zoom -> [[lat, lng, [linhas]], ...] ou null
+let currentRender = 0; // Desenho de marcadores mais recente (descarta desenhos atrasados)
 let currentInstitutionName = ''; // Para a funcionalidade IA
 
 // Configurações do mapa - Agora para todo o Brasil
@@ -22,6 +26,9 @@ const MARKER_COLORS = {
     'Outros': '#6b7280'             // Cinza
 };
 
+// Último zoom com agrupamentos pré-calculados (ZOOM_MAXIMO_AGRUPAMENTO em agrupamento.py)
+const ZOOM_MAXIMO_AGRUPAMENTO = 13;
+
 // Inicialização quando a página carrega
 document.addEventListener('DOMContentLoaded', function() {
     showLoading();
@@ -52,19 +59,16 @@ function initializeMap() {
 
     // Criar layer group para os marcadores
     markersLayer = L.layerGroup().addTo(map);
+    
+    // Redesenhar ao mover ou aproximar (agrupamentos do novo zoom, área visível)
+    map.on('moveend', displayMarkers);
 }
 
 // Carregar dados das instituições
 async function loadData() {
     try {
         console.log('Carregando dados das instituições...');
-        const response = await fetch('data.json');
-        
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        
-        instituicoes = await response.json();
+        instituicoes = await fetchInstituicoes();
         console.log(`${instituicoes.length} instituições carregadas`);
         
         filteredInstituicoes = [...instituicoes];
@@ -82,6 +86,91 @@ async function loadData() {
     }
 }
 
+// Buscar as instituições: primeiro o data.min.json (compacto, gerado pelo
+// pipeline); se ele não existir ou tiver outro formato, o data.json completo
+async function fetchInstituicoes() {
+    try {
+        const compacto = await fetch('data.min.json');
+        if (compacto.ok) {
+            const payload = await compacto.json();
+            if (payload.versao === 1) {
+                facetas = payload.facetas;
+                searchIndex = payload.busca || null;
+                return decodePainelCompacto(payload);
+            }
+        }
+    } catch (error) {
+        console.warn('data.min.json indisponível, usando data.json:', error);
+    }
+    
+    const response = await fetch('data.json');
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+}
+
+// Reconstruir os registros (mesmas chaves do data.json) a partir das colunas;
+// colunas com tabela guardam o índice do valor
+function decodePainelCompacto(payload) {
+    const { total, tabelas, colunas } = payload;
+    const nomes = Object.keys(colunas);
+    const registros = new Array(total);
+    
+    for (let i = 0; i < total; i++) {
+        const registro = {};
+        for (const nome of nomes) {
+            const valor = colunas[nome][i];
+            registro[nome] = tabelas[nome] ? tabelas[nome][valor] : valor;
+        }
+        registros[i] = registro;
+    }
+    
+    return registros;
+}
+
+// Valores distintos de uma coluna, em ordem (das facetas pré-calculadas, se houver)
+function facetValues(coluna) {
+    if (facetas && facetas[coluna]) {
+        return facetas[coluna].map(([valor]) => valor);
+    }
+    return [...new Set(instituicoes.map(inst => inst[coluna]))].filter(Boolean).sort();
+}
+
+// Texto sem acentos e em minúsculas (mesma regra de termos_busca no exportacao.py)
+function foldSearchText(texto) {
+    return texto.normalize('NFD').replace(/[\u0300-\u036f]/g, '').toLowerCase();
+}
+
+// Linhas (índices em instituicoes) com todos os termos buscados, cada um como
+// prefixo de algum termo indexado; null se a busca não tem termos
+function searchRows(searchTerm) {
+    const termosBusca = foldSearchText(searchTerm).split(/[^a-z0-9]+/).filter(Boolean);
+    const { termos, linhas } = searchIndex;
+    let resultado = null;
+    
+    for (const termo of termosBusca) {
+        // Primeiro termo do vocabulário >= termo; os que têm o prefixo vêm em seguida
+        let inicio = 0;
+        let fim = termos.length;
+        while (inicio < fim) {
+            const meio = (inicio + fim) >> 1;
+            if (termos[meio] < termo) inicio = meio + 1;
+            else fim = meio;
+        }
+        
+        const encontradas = new Set();
+        for (let i = inicio; i < termos.length && termos[i].startsWith(termo); i++) {
+            linhas[i].forEach(linha => encontradas.add(linha));
+        }
+        
+        resultado = resultado === null ? encontradas : new Set([...resultado].filter(linha => encontradas.has(linha)));
+        if (resultado.size === 0) break;
+    }
+    
+    return resultado;
+}
+
 // Configurar event listeners
 function setupEventListeners() {
     // Busca
@@ -110,23 +199,19 @@ function setupEventListeners() {
 function updateStats() {
     document.getElementById('total-instituicoes').textContent = instituicoes.length;
     
-    const estadosUnicos = new Set(instituicoes.map(inst => inst.Estado));
-    document.getElementById('total-cidades').textContent = estadosUnicos.size;
+    document.getElementById('total-cidades').textContent = facetValues('Estado').length;
 }
 
 // Popular filtros
 function populateFilters() {
     // Tipos únicos (baseado na coluna Tipo)
-    const tipos = [...new Set(instituicoes.map(inst => inst.Tipo))].filter(Boolean).sort();
-    populateMultiSelectOptions('tipo', tipos);
+    populateMultiSelectOptions('tipo', facetValues('Tipo'));
     
     // Setores únicos
-    const setores = [...new Set(instituicoes.map(inst => inst.Setor))].filter(Boolean).sort();
-    populateMultiSelectOptions('setor', setores);
+    populateMultiSelectOptions('setor', facetValues('Setor'));
     
     // Estados únicos
-    const estados = [...new Set(instituicoes.map(inst => inst.Estado))].filter(Boolean).sort();
-    populateMultiSelectOptions('estado', estados);
+    populateMultiSelectOptions('estado', facetValues('Estado'));
 }
 
 // Determinar tipo de instituição para cor do marcador
@@ -157,34 +242,97 @@ function createCustomIcon(type) {
     });
 }
 
-// Exibir marcadores no mapa
-function displayMarkers() {
+// Exibir marcadores no mapa: até o zoom ZOOM_MAXIMO_AGRUPAMENTO, os agrupamentos
+// pré-calculados pelo pipeline (agrupamentos/z<zoom>.json); acima dele, ou sem
+// esses arquivos, um marcador por instituição. Só o que está na área visível é desenhado.
+async function displayMarkers() {
     // Verificar se o mapa e markersLayer estão inicializados
     if (!map || !markersLayer) {
         console.error('Mapa ou markersLayer não inicializados');
         return;
     }
     
+    const render = ++currentRender;
+    const zoom = map.getZoom();
+    const clusters = zoom <= ZOOM_MAXIMO_AGRUPAMENTO ? await loadClusters(zoom) : null;
+    
+    // Um desenho mais novo começou enquanto o arquivo era carregado
+    if (render !== currentRender) return;
+    
     // Limpar marcadores existentes
     markersLayer.clearLayers();
     currentMarkers = [];
     
-    filteredInstituicoes.forEach((instituicao, index) => {
-        if (!instituicao.latitude || !instituicao.longitude) return;
-        
-        const type = getInstitutionType(instituicao);
-        const icon = createCustomIcon(type);
+    const bounds = map.getBounds().pad(0.2);
+    const indices = new Map(filteredInstituicoes.map((instituicao, index) => [instituicao, index]));
+    
+    if (!clusters) {
+        filteredInstituicoes.forEach((instituicao, index) => {
+            if (!instituicao.latitude || !instituicao.longitude) return;
+            if (!bounds.contains([instituicao.latitude, instituicao.longitude])) return;
+            addInstitutionMarker(instituicao, index);
+        });
+        return;
+    }
+    
+    clusters.forEach(([latitude, longitude, linhas]) => {
+        if (!bounds.contains([latitude, longitude])) return;
         
-        const marker = L.marker([instituicao.latitude, instituicao.longitude], { icon })
-            .bindPopup(createPopupContent(instituicao))
-            .addTo(markersLayer);
+        // Membros do agrupamento que passam pelos filtros atuais
+        const visiveis = linhas.map(linha => instituicoes[linha]).filter(instituicao => indices.has(instituicao));
         
-        currentMarkers.push(marker);
+        if (visiveis.length === 1) {
+            addInstitutionMarker(visiveis[0], indices.get(visiveis[0]));
+        } else if (visiveis.length > 1) {
+            addClusterMarker(latitude, longitude, visiveis.length);
+        }
+    });
+}
+
+// Carregar (uma vez) os agrupamentos de um nível de zoom; null se não existirem
+async function loadClusters(zoom) {
+    if (!(zoom in clustersPorZoom)) {
+        try {
+            const response = await fetch(`agrupamentos/z${zoom}.json`);
+            clustersPorZoom[zoom] = response.ok ? await response.json() : null;
+        } catch (error) {
+            clustersPorZoom[zoom] = null;
+        }
+    }
+    return clustersPorZoom[zoom];
+}
+
+// Marcador de uma instituição (index: posição em filteredInstituicoes)
+function addInstitutionMarker(instituicao, index) {
+    const type = getInstitutionType(instituicao);
+    const icon = createCustomIcon(type);
+    
+    const marker = L.marker([instituicao.latitude, instituicao.longitude], { icon })
+        .bindPopup(createPopupContent(instituicao, index))
+        .addTo(markersLayer);
+    
+    currentMarkers.push(marker);
+}
+
+// Marcador de agrupamento com a contagem; o clique aproxima o mapa
+function addClusterMarker(latitude, longitude, total) {
+    const tamanho = total < 10 ? 30 : total < 100 ? 38 : 46;
+    const icon = L.divIcon({
+        className: 'cluster-marker',
+        html: `<div>${total}</div>`,
+        iconSize: [tamanho, tamanho],
+        iconAnchor: [tamanho / 2, tamanho / 2]
     });
+    
+    const marker = L.marker([latitude, longitude], { icon })
+        .on('click', () => map.setView([latitude, longitude], Math.min(map.getZoom() + 2, map.getMaxZoom())))
+        .addTo(markersLayer);
+    
+    currentMarkers.push(marker);
 }
 
 // Criar conteúdo do popup
-function createPopupContent(instituicao) {
+function createPopupContent(instituicao, index) {
     const nome = instituicao['Nome da Instituição/Tipo'] || 'Nome não disponível';
     const tipo = instituicao.Tipo || 'Não informado';
     const cidade = instituicao.Cidade || 'Não informado';
@@ -214,7 +362,7 @@ function createPopupContent(instituicao) {
     }
     
     popupContent += `
-                <button onclick="showModal(${filteredInstituicoes.indexOf(instituicao)})" class="btn-details">Ver detalhes</button>
+                <button onclick="showModal(${index})" class="btn-details">Ver detalhes</button>
             </div>
         </div>
     `;
@@ -226,20 +374,15 @@ function createPopupContent(instituicao) {
 function applyFilters() {
     const searchTerm = document.getElementById('search-input').value.toLowerCase();
     
-    filteredInstituicoes = instituicoes.filter(instituicao => {
-        // Filtro de busca
-        const nome = (instituicao['Nome da Instituição/Tipo'] || '').toLowerCase();
-        const tipo = (instituicao.Tipo || '').toLowerCase();
-        const cidade = (instituicao.Cidade || '').toLowerCase();
-        const estado = (instituicao.Estado || '').toLowerCase();
-        const setor = (instituicao.Setor || '').toLowerCase();
-        
-        const matchesSearch = !searchTerm || 
-            nome.includes(searchTerm) || 
-            tipo.includes(searchTerm) || 
-            cidade.includes(searchTerm) || 
-            estado.includes(searchTerm) ||
-            setor.includes(searchTerm);
+    // Com o índice, só as linhas encontradas nele passam pelos demais filtros
+    const linhasBusca = searchIndex && searchTerm ? searchRows(searchTerm) : null;
+    const candidatas = linhasBusca
+        ? [...linhasBusca].sort((a, b) => a - b).map(linha => instituicoes[linha])
+        : instituicoes;
+    
+    filteredInstituicoes = candidatas.filter(instituicao => {
+        // Filtro de busca (sem índice: substring nos campos)
+        const matchesSearch = !searchTerm || searchIndex !== null || matchesSubstring(instituicao, searchTerm);
         
         // Filtros múltiplos
         const matchesTipo = selectedFilters.tipo.length === 0 || 
@@ -258,6 +401,21 @@ function applyFilters() {
     updateResultsList();
 }
 
+// Busca sem índice (data.json completo): substring em qualquer campo
+function matchesSubstring(instituicao, searchTerm) {
+    const nome = (instituicao['Nome da Instituição/Tipo'] || '').toLowerCase();
+    const tipo = (instituicao.Tipo || '').toLowerCase();
+    const cidade = (instituicao.Cidade || '').toLowerCase();
+    const estado = (instituicao.Estado || '').toLowerCase();
+    const setor = (instituicao.Setor || '').toLowerCase();
+    
+    return nome.includes(searchTerm) || 
+        tipo.includes(searchTerm) || 
+        cidade.includes(searchTerm) || 
+        estado.includes(searchTerm) ||
+        setor.includes(searchTerm);
+}
+
 // Resetar filtros
 function resetFilters() {
     document.getElementById('search-input').value = '';
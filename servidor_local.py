@@ -0,0 +1,239 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from fronteira import dominio_registravel
+
+# Servidor HTTP local que faz o papel dos sites das instituições e do Nominatim,
+# para medir o crawler e a geocodificação sem rede (PAINEL_HTTP=local:<url>).
+# O primeiro segmento do caminho é o host original (/www.ufrgs.br/contato):
+# qualquer host vira um site sintético, gerado de forma determinística a partir
+# do nome. /<host>/search responde como o Nominatim.
+
+PORTA_PADRAO = 8800
+
+# Páginas linkadas em cada site sintético: início, contato, sobre e algumas notícias
+NOTICIAS_POR_SITE = 8
+PARAGRAFOS_POR_PAGINA = 20
+
+# Parte dos sites sem email em página nenhuma, e parte com o email só na página de contato
+FRACAO_SEM_EMAIL = 0.15
+FRACAO_EMAIL_SO_NO_CONTATO = 0.5
+
+# Caixa aproximada do RS, onde caem as coordenadas do Nominatim falso
+LIMITES_RS = (-33.7, -27.1, -57.6, -49.7)
+
+# Parte das cidades que o Nominatim falso não encontra (lista vazia)
+FRACAO_NAO_ENCONTRADAS = 0.05
+
+PALAVRAS = ['pesquisa', 'inovação', 'campus', 'edital', 'extensão', 'ensino', 'tecnologia', 'parque',
+            'laboratório', 'incubadora', 'graduação', 'projeto']
+
+class ConfiguracaoServidor:
+    """Latência (em segundos, média e variação) e taxa de erros 503 de cada tipo de resposta"""
+
+    def __init__(self, latencia_sites=0.0, latencia_nominatim=0.0, variacao=0.0,
+                 erros_sites=0.0, erros_nominatim=0.0, semente=0):
+        self.latencia_sites = latencia_sites
+        self.latencia_nominatim = latencia_nominatim
+        self.variacao = variacao
+        self.erros_sites = erros_sites
+        self.erros_nominatim = erros_nominatim
+        self.semente = semente
+
+def _aleatorio(*partes):
+    # Gerador determinístico por chave: mesmo host/caminho, mesmo conteúdo
+    digest = hashlib.sha256('\x1f'.join(map(str, partes)).encode('utf-8')).digest()
+    return random.Random(int.from_bytes(digest[:8], 'big'))
+
+def perfil_site(host):
+    """Como é o site sintético de um host: (domínio dos emails, onde ficam os emails)"""
+    aleatorio = _aleatorio('perfil', host)
+    dominio = dominio_registravel(host)
+
+    sorteio = aleatorio.random()
+    if sorteio < FRACAO_SEM_EMAIL:
+        return dominio, 'nenhum'
+    if sorteio < FRACAO_SEM_EMAIL + FRACAO_EMAIL_SO_NO_CONTATO:
+        return dominio, 'contato'
+    return dominio, 'rodape'
+
+def pagina_site(host, caminho):
+    """HTML de uma página do site sintético, ou None se a página não existe
+
+    Qualquer caminho é uma página (os sites da planilha começam em caminhos
+    como /unidades/... ou /campus/3); só as imagens dão 404.
+    """
+    caminho = caminho.rstrip('/') or '/'
+    if caminho.startswith('/img/'):
+        return None
+
+    dominio, onde_emails = perfil_site(host)
+    aleatorio = _aleatorio('pagina', host, caminho)
+
+    partes = [f'<html><head><title>{host}</title><script>var pagina = "{caminho}";</script></head><body><nav>']
+    partes.append('<a href="/">Início</a><a href="/sobre">Sobre</a><a href="/contato">Fale Conosco</a>')
+    partes.extend(f'<a href="/noticias/{i}">Notícia {i}</a>' for i in range(NOTICIAS_POR_SITE))
+    partes.append('<a href="https://www.gov.br/">Governo</a></nav>')
+
+    for i in range(PARAGRAFOS_POR_PAGINA):
+        texto = ' '.join(aleatorio.choice(PALAVRAS) for _ in range(40))
+        partes.append(f'<div class="noticia"><h2>{caminho} {i}</h2><p>{texto}</p><img src="/img/foto{i}@2x.png"></div>')
+
+    partes.append('<footer>')
+    if onde_emails == 'rodape' or (onde_emails == 'contato' and caminho == '/contato'):
+        partes.append(f'<p>Secretaria: secretaria@{dominio}</p><a href="mailto:gabinete@{dominio}">Gabinete</a>')
+    partes.append('<p>Desenvolvido por <a href="mailto:suporte@agencia-web.com.br">Agência</a></p></footer>')
+    partes.append('</body></html>')
+
+    return ''.join(partes).encode('utf-8')
+
+def resposta_nominatim(consulta):
+    """Corpo JSON do Nominatim falso: um ponto no RS determinado pela consulta (ou lista vazia)"""
+    aleatorio = _aleatorio('nominatim', consulta.lower())
+    if aleatorio.random() < FRACAO_NAO_ENCONTRADAS:
+        return b'[]'
+
+    lat_min, lat_max, lon_min, lon_max = LIMITES_RS
+    resultado = {
+        'lat': f"{aleatorio.uniform(lat_min, lat_max):.7f}",
+        'lon': f"{aleatorio.uniform(lon_min, lon_max):.7f}",
+        'display_name': consulta,
+    }
+    return json.dumps([resultado], ensure_ascii=False).encode('utf-8')
+
+class ManipuladorLocal(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, status, corpo=b'', tipo='text/html; charset=utf-8', etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(corpo)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(corpo)
+
+    def do_GET(self):
+        servidor = self.server
+        partes = urlsplit(self.path)
+
+        if partes.path == '/_estatisticas':
+            corpo = json.dumps(servidor.estatisticas()).encode('utf-8')
+            return self._responder(200, corpo, 'application/json')
+
+        host, _, caminho = partes.path.lstrip('/').partition('/')
+        caminho = '/' + caminho
+        nominatim = caminho.rstrip('/') == '/search'
+        tipo = 'nominatim' if nominatim else 'sites'
+
+        # Latência e erros sorteados por requisição (determinísticos pela ordem de chegada)
+        configuracao = servidor.configuracao
+        ordem = servidor.contar(tipo, self.path)
+        aleatorio = _aleatorio('requisicao', configuracao.semente, self.path, ordem)
+
+        latencia = configuracao.latencia_nominatim if nominatim else configuracao.latencia_sites
+        if latencia or configuracao.variacao:
+            time.sleep(max(0.0, aleatorio.gauss(latencia, configuracao.variacao)))
+
+        taxa_erros = configuracao.erros_nominatim if nominatim else configuracao.erros_sites
+        if aleatorio.random() < taxa_erros:
+            servidor.contar('erros')
+            return self._responder(503, b'servico indisponivel', 'text/plain')
+
+        if nominatim:
+            consulta = parse_qs(partes.query).get('q', [''])[0]
+            return self._responder(200, resposta_nominatim(consulta), 'application/json')
+
+        corpo = pagina_site(host, caminho)
+        if corpo is None:
+            return self._responder(404, b'nao encontrada', 'text/plain')
+
+        # ETag pelo conteúdo: revalidações do cache de páginas recebem 304
+        etag = '"' + hashlib.sha1(corpo).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            servidor.contar('nao_modificadas')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        servidor.contar('bytes', quantidade=len(corpo))
+        self._responder(200, corpo, etag=etag)
+
+    do_HEAD = do_GET
+
+class ServidorLocal(ThreadingHTTPServer):
+    """Servidor dos sites sintéticos e do Nominatim falso, com contadores de requisições"""
+
+    daemon_threads = True
+
+    def __init__(self, porta=PORTA_PADRAO, configuracao=None, host='127.0.0.1'):
+        super().__init__((host, porta), ManipuladorLocal)
+        self.configuracao = configuracao or ConfiguracaoServidor()
+        self.contadores = Counter()
+        self.por_caminho = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def url_base(self):
+        host, porta = self.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def contar(self, chave, caminho=None, quantidade=1):
+        """Soma num contador; com caminho, retorna quantas vezes ele já foi pedido antes"""
+        with self.lock:
+            self.contadores[chave] += quantidade
+            if caminho is not None:
+                self.por_caminho[caminho] += 1
+                return self.por_caminho[caminho] - 1
+
+    def estatisticas(self):
+        with self.lock:
+            return dict(self.contadores)
+
+def iniciar_servidor(porta=0, configuracao=None):
+    """Sobe o servidor numa thread em segundo plano (porta 0: porta livre); retorna o servidor
+
+    Para usar nos scripts: PAINEL_HTTP=local:<servidor.url_base>. Encerrar com
+    servidor.shutdown().
+    """
+    servidor = ServidorLocal(porta, configuracao)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def main():
+    parser = argparse.ArgumentParser(description="Sites sintéticos e Nominatim falso para medições sem rede")
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO, help=f"porta (padrão: {PORTA_PADRAO})")
+    parser.add_argument('--latencia-sites', type=float, default=0.0, help="latência média dos sites, em segundos")
+    parser.add_argument('--latencia-nominatim', type=float, default=0.0, help="latência média do Nominatim, em segundos")
+    parser.add_argument('--variacao', type=float, default=0.0, help="desvio padrão da latência, em segundos")
+    parser.add_argument('--erros-sites', type=float, default=0.0, help="fração de respostas 503 dos sites (0 a 1)")
+    parser.add_argument('--erros-nominatim', type=float, default=0.0, help="fração de respostas 503 do Nominatim")
+    parser.add_argument('--semente', type=int, default=0, help="semente dos sorteios de latência e erros")
+    args = parser.parse_args()
+
+    configuracao = ConfiguracaoServidor(args.latencia_sites, args.latencia_nominatim, args.variacao,
+                                        args.erros_sites, args.erros_nominatim, args.semente)
+    servidor = ServidorLocal(args.porta, configuracao)
+
+    print(f"Servidor local em {servidor.url_base}")
+    print(f"Use: PAINEL_HTTP=local:{servidor.url_base} python buscar_emails.py")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nEstatísticas: {servidor.estatisticas()}")
+
+if __name__ == "__main__":
+    main()
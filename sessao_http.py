@@ -0,0 +1,76 @@
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from backends_http import nova_sessao
+from metricas import contar
+
+# Quantidade de hosts com pool de conexões mantido em memória
+POOL_HOSTS = 64
+
+# Conexões keep-alive por host (deve cobrir a concorrência máxima do crawler)
+POOL_CONEXOES_POR_HOST = 16
+
+# Novas tentativas com espera exponencial (0.5s, 1s, 2s...) para falhas transitórias
+TENTATIVAS = 3
+BACKOFF = 0.5
+STATUS_REPETIR = (429, 500, 502, 503, 504)
+
+# Identificação usada pelo crawler (navegador comum) e pelo geocodificador
+USER_AGENT_NAVEGADOR = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+_sessoes = {}
+_lock = threading.Lock()
+
+def _medir_resposta(response, *args, **kwargs):
+    # Hook de resposta do requests: uma por requisição concluída (as novas tentativas internas não contam)
+    contar('http.requisicoes')
+    contar(f'http.status.{response.status_code}')
+    contar('http.bytes', len(response.content))
+
+def criar_sessao(user_agent=None, pool_hosts=POOL_HOSTS, pool_conexoes=POOL_CONEXOES_POR_HOST,
+                 tentativas=TENTATIVAS, backoff=BACKOFF):
+    """Cria uma sessão HTTP com pool de conexões keep-alive e novas tentativas
+
+    A sessão vem do backend escolhido em PAINEL_HTTP (rede, servidor local ou
+    respostas gravadas; ver backends_http).
+    """
+    sessao = nova_sessao()
+
+    retry = Retry(
+        total=tentativas,
+        connect=tentativas,
+        read=tentativas,
+        status=tentativas,
+        backoff_factor=backoff,
+        status_forcelist=STATUS_REPETIR,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+    adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_conexoes, max_retries=retry)
+    sessao.mount('http://', adapter)
+    sessao.mount('https://', adapter)
+
+    if user_agent:
+        sessao.headers['User-Agent'] = user_agent
+
+    sessao.hooks['response'].append(_medir_resposta)
+
+    return sessao
+
+def obter_sessao(nome, **configuracao):
+    """Retorna a sessão compartilhada com esse nome, criando-a na primeira chamada
+
+    A configuração só é usada na criação; chamadas seguintes reaproveitam a
+    mesma sessão (e suas conexões abertas) em todo o processo.
+    """
+    with _lock:
+        if nome not in _sessoes:
+            _sessoes[nome] = criar_sessao(**configuracao)
+        return _sessoes[nome]
+
+def sessao_crawler():
+    """Sessão compartilhada pelas buscas de emails nos sites das instituições"""
+    return obter_sessao('crawler', user_agent=USER_AGENT_NAVEGADOR)
@@ -0,0 +1,33 @@
+from extracao_emails import extrair_emails, extrair_links
+from metricas import execucao
+
+# HTML da página -> emails esperados (conjunto, em minúsculas)
+CASOS = [
+    ('<p>Fale com contato@inst.edu.br</p>', {'contato@inst.edu.br'}),
+    ('<a href="mailto:Reitoria%40inst.edu.br">Reitoria</a>', {'reitoria@inst.edu.br'}),
+    ('<p>fulano [at] inst (ponto) br</p>', {'fulano@inst.br'}),
+    ('<p>fulano&#64;inst.edu.br</p>', {'fulano@inst.edu.br'}),
+    ('<img src="logo@2x.png">', set()),
+    # Endereços partidos por tags: só saem do texto da página, sem as tags
+    ('<p>contato@<span>inst</span>.edu.br</p>', {'contato@inst.edu.br'}),
+    ('<p><b>ouvidoria</b>@inst.edu.br</p>', {'ouvidoria@inst.edu.br'}),
+    ('<p>gabinete@inst<span>.</span>edu<span>.</span>br</p>', {'gabinete@inst.edu.br'}),
+    ('<p>secretaria@<span>inst</span>&#46;edu.br</p>', {'secretaria@inst.edu.br'}),
+    ('<p>sem email aqui, só um @ solto</p>', set()),
+]
+
+def testar_extracao_emails():
+    """Confere a extração de emails nos bytes do HTML, inclusive endereços partidos por tags"""
+    for pagina, esperados in CASOS:
+        for conteudo in (pagina, pagina.encode('utf-8')):
+            encontrados = set(extrair_emails(conteudo))
+            assert encontrados == esperados, f"{pagina}: {encontrados}, esperado {esperados}"
+        print(f"✅ {pagina} -> {sorted(esperados)}")
+
+    links = extrair_links('<a href="/contato">Fale conosco</a><a href="/noticias">Notícias</a>', 'https://inst.edu.br/')
+    assert links == ['https://inst.edu.br/contato'], links
+    print("✅ Links de contato")
+
+if __name__ == "__main__":
+    with execucao('teste_extracao_emails'):
+        testar_extracao_emails()
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+
+from fluxo_json import gravar_json_array, gravar_ndjson, ler_json_array, ler_ndjson
+from metricas import execucao
+
+# Registros com o que costuma quebrar um leitor em blocos: acentos, números
+# cortados no meio ("3.25" -> "3."), colchetes e vírgulas dentro de strings
+REGISTROS = [
+    {'Nome da Instituição/Tipo': 'Universidade Federal do Rio Grande do Sul', 'Cidade': 'Porto Alegre',
+     'latitude': -30.0346, 'longitude': -51.2177},
+    {'nome': 'texto com ] e , e [ dentro', 'lista': [1, 2.5, None, True], 'vazio': {}},
+    3.25,
+    'só uma string',
+    [],
+    {'aninhado': {'a': [{'b': 'c'}]}},
+]
+
+# Tamanhos de bloco pequenos forçam cortes em todas as posições possíveis
+TAMANHOS_BLOCO = (1, 2, 3, 7, 64 * 1024)
+
+# Conteúdos que json.load recusa e o leitor também precisa recusar
+INVALIDOS = ['', '   ', '{}', '[', '[1', '[1,', '[1,]', '[1, ]', '[,1]', '[1,,2]', '[1 2]',
+             '[1]]', '[1] x', '[1]\n[2]', '[] ,', '[{"a": 1},]']
+
+# Conteúdos válidos com espaços e quebras de linha em volta
+VALIDOS = ['[]', '  [ ]  ', '[]\n', '\n[1]\n\n', '[1,2]', '[ 1 , 2 ]']
+
+def testar_fluxo_json():
+    """Confere ida e volta dos registros e a rejeição de arrays JSON inválidos"""
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'registros.json')
+        caminho_ndjson = os.path.join(diretorio, 'registros.jsonl')
+
+        # Ida e volta: mesma saída de json.dump e mesmos registros na leitura
+        for registros in (REGISTROS, [], REGISTROS[:1]):
+            assert gravar_json_array(registros, caminho) == len(registros)
+            with open(caminho, encoding='utf-8') as f:
+                assert f.read() == json.dumps(registros, ensure_ascii=False, indent=2)
+            for tamanho in TAMANHOS_BLOCO:
+                assert list(ler_json_array(caminho, tamanho)) == registros, tamanho
+
+            assert gravar_ndjson(registros, caminho_ndjson) == len(registros)
+            assert list(ler_ndjson(caminho_ndjson)) == registros
+        print(f"✅ Ida e volta: {len(REGISTROS)} registros, blocos de {TAMANHOS_BLOCO}")
+
+        for conteudo in VALIDOS:
+            with open(caminho, 'w', encoding='utf-8') as f:
+                f.write(conteudo)
+            for tamanho in TAMANHOS_BLOCO:
+                assert list(ler_json_array(caminho, tamanho)) == json.loads(conteudo), (conteudo, tamanho)
+        print(f"✅ Válidos: {len(VALIDOS)} conteúdos aceitos")
+
+        for conteudo in INVALIDOS:
+            with open(caminho, 'w', encoding='utf-8') as f:
+                f.write(conteudo)
+            for tamanho in TAMANHOS_BLOCO:
+                try:
+                    list(ler_json_array(caminho, tamanho))
+                except ValueError:
+                    continue
+                raise AssertionError(f"{conteudo!r} (blocos de {tamanho}) deveria levantar ValueError")
+        print(f"✅ Inválidos: {len(INVALIDOS)} conteúdos recusados")
+
+if __name__ == "__main__":
+    with execucao('teste_fluxo_json'):
+        testar_fluxo_json()
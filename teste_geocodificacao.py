@@ -0,0 +1,34 @@
+from geocodificacao import CONFIANCA_MINIMA, buscar_municipio_aproximado, geocodificar_em_lote
+from metricas import execucao
+
+# Nome na planilha -> município esperado no gazetteer (None = não deve adivinhar)
+CASOS = [
+    ('Caxias do Sul', 'Caxias do Sul'),
+    ('Porto Alegre/RS', 'Porto Alegre'),
+    ('Pelotaz', 'Pelotas'),                    # erro de digitação
+    ('Jaguarão do Sul', 'Jaguarão'),           # sufixo a mais na planilha
+    ('Campus Alvorada', 'Alvorada'),
+    ('Santana Livramento', "Sant'Ana do Livramento"),
+    ('Sao Jose', None),                        # São José do Sul? São José/SC?
+    ('Caxias', None),                          # Caxias do Sul? Caxias/MA?
+    ('Rio Grande do Sul', None),               # nome do estado, não do município Rio Grande
+]
+
+def testar_geocodificacao():
+    """Confere a busca aproximada no gazetteer, inclusive a recusa de nomes ambíguos"""
+    for cidade, esperado in CASOS:
+        municipio, confianca = buscar_municipio_aproximado(cidade, 'RS')
+        nome = municipio['nome'] if municipio else None
+        assert nome == esperado, f"{cidade}: {nome} ({confianca}), esperado {esperado}"
+        if esperado is None:
+            assert confianca < CONFIANCA_MINIMA, f"{cidade}: confiança {confianca}"
+        print(f"✅ {cidade} -> {nome} ({confianca})")
+
+    # Sem API, nomes ambíguos e de estado ficam sem coordenadas
+    lote = geocodificar_em_lote([('Caxias', 'RS'), ('Rio Grande do Sul', 'RS')], usar_api=False)
+    assert all(resultado[2] == 'nao_encontrada' for resultado in lote.values()), lote
+    print("✅ Em lote: nomes ambíguos ficam como nao_encontrada")
+
+if __name__ == "__main__":
+    with execucao('teste_geocodificacao'):
+        testar_geocodificacao()